@@ -0,0 +1,145 @@
+"""
+Startup-time budget check of the application "Gemini AI App Store".
+Starts the store in fresh interpreters with `python -X importtime` and fails if importing main,
+or painting the window for the first time, takes longer than its budget, or if a module the
+store defers until after the first paint is imported before it. Painting needs a display;
+without one only the imports are checked.
+Author: SoftwareApkDev
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from store_launch import LaunchProfile, parse_importtime_line, probe_command
+
+IMPORT_BUDGET_SECONDS = 0.25
+FIRST_PAINT_BUDGET_SECONDS = 1.5
+FIRST_PAINT_TIMEOUT_SECONDS = 60
+# Modules the store only imports once they are used, never to show its window
+DEFERRED_MODULES = ("importlib.metadata", "logging.handlers", "webbrowser", "venv", "tempfile", "hashlib", "shutil", "http.server")
+
+
+def has_display():
+    """True if Tk windows can be shown (Windows and macOS always have a display)."""
+    return bool(os.environ.get("DISPLAY")) or sys.platform in ("win32", "darwin")
+
+
+def child_environment():
+    env = dict(os.environ)
+    # Installed stores have their bytecode, so measure with it rather than compiling every time
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    return env
+
+
+def measure_import():
+    """Imports main in a fresh interpreter. Returns (seconds, names of the modules imported)."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"], cwd=REPO_DIR, env=child_environment(),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
+    seconds = None
+    modules = []
+    for line in result.stderr.splitlines():
+        parsed = parse_importtime_line(line)
+        if parsed is not None:
+            module, _, cumulative_us, depth = parsed
+            modules.append(module)
+            if module == "main" and depth == 0:
+                seconds = cumulative_us / 1e6
+    return seconds, modules
+
+
+def measure_first_paint():
+    """Starts the store through the launch probe until its window is mapped.
+
+    Returns (launch profile dict, names of the modules imported before the first paint).
+    The profile's time_to_first_window is None if no window appeared in time.
+    """
+    profile = LaunchProfile("gemini_ai_app_store", None, "main")
+    process = subprocess.Popen(probe_command(sys.executable, "main"), cwd=REPO_DIR, env=child_environment(),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    timer = threading.Timer(FIRST_PAINT_TIMEOUT_SECONDS, process.kill)
+    timer.start()
+    modules = []
+    try:
+        for line in process.stderr:
+            profile.feed_line(line)
+            if profile.time_to_first_window is not None:
+                break
+            parsed = parse_importtime_line(line)
+            if parsed is not None:
+                modules.append(parsed[0])
+    finally:
+        timer.cancel()
+        process.kill()
+        process.wait()
+        process.stderr.close()
+    return profile.to_dict(), modules
+
+
+def check(runs, import_budget, first_paint_budget):
+    """Runs the checks, printing a report. Returns True if every budget was met."""
+    ok = True
+    deferred_imported = set()
+
+    import_seconds = None
+    for _ in range(runs):
+        seconds, modules = measure_import()
+        import_seconds = seconds if import_seconds is None else min(import_seconds, seconds)
+        deferred_imported.update(module for module in modules if module in DEFERRED_MODULES)
+    print(f"import main: {import_seconds:.3f}s (budget {import_budget:.3f}s)")
+    if import_seconds > import_budget:
+        ok = False
+
+    if has_display():
+        best = None
+        for _ in range(runs):
+            profile, modules = measure_first_paint()
+            deferred_imported.update(module for module in modules if module in DEFERRED_MODULES)
+            if profile["time_to_first_window"] is not None and (best is None or profile["time_to_first_window"] < best["time_to_first_window"]):
+                best = profile
+        if best is None:
+            print(f"first paint: no window appeared within {FIRST_PAINT_TIMEOUT_SECONDS}s")
+            ok = False
+        else:
+            print(f"first paint: {best['time_to_first_window']:.3f}s (budget {first_paint_budget:.3f}s), "
+                  f"of which {best['import_seconds']:.3f}s importing")
+            print("  Slowest imports: " + ", ".join(f"{module} {seconds:.3f}s" for module, seconds in best["slowest_imports"]))
+            if best["time_to_first_window"] > first_paint_budget:
+                ok = False
+    else:
+        print("first paint: skipped, there is no display (set DISPLAY, e.g. by running under xvfb-run)")
+
+    if deferred_imported:
+        print(f"Imported before the first paint, but should be deferred: {', '.join(sorted(deferred_imported))}")
+        ok = False
+    print("OK" if ok else "FAILED")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Checks that the Gemini AI App Store starts within its time budget.")
+    parser.add_argument("--runs", type=int, default=3, help="runs per measurement; the fastest counts (default: 3)")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET_SECONDS, metavar="SECONDS",
+                        help=f"longest time importing main may take (default: {IMPORT_BUDGET_SECONDS})")
+    parser.add_argument("--first-paint-budget", type=float, default=FIRST_PAINT_BUDGET_SECONDS, metavar="SECONDS",
+                        help=f"longest time until the window is painted (default: {FIRST_PAINT_BUDGET_SECONDS})")
+    args = parser.parse_args(argv)
+
+    # Start from an empty store data directory, so the result does not depend on this machine's catalog or logs
+    home = tempfile.mkdtemp(prefix="gemini-app-store-startup-")
+    os.environ["HOME"] = os.environ["USERPROFILE"] = home
+    try:
+        return 0 if check(args.runs, args.import_budget, args.first_paint_budget) else 1
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Offline fixtures for the benchmarks of the application "Gemini AI App Store":
+generated dummy `gemini_*` wheels (a local, file-based package index), a fake `pip`
+that emits configurable output on stdout and stderr, and large generated app catalogs.
+Author: SoftwareApkDev
+"""
+
+import base64
+import hashlib
+import json
+import os
+import zipfile
+
+FAKE_PIP_MAIN = '''\
+"""Stand-in for `python -m pip` in the benchmarks. Configured through environment variables."""
+import os
+import sys
+import time
+
+lines = int(os.environ.get("FAKE_PIP_LINES", "20"))
+line_bytes = int(os.environ.get("FAKE_PIP_LINE_BYTES", "80"))
+stderr_lines = int(os.environ.get("FAKE_PIP_STDERR_LINES", "0")) # Spread between the stdout lines
+seconds = float(os.environ.get("FAKE_PIP_SECONDS", "0"))
+returncode = int(os.environ.get("FAKE_PIP_RETURNCODE", "0"))
+
+# Positional arguments after the subcommand are the packages; skip the values of options that take one
+packages = []
+arguments = iter(sys.argv[2:])
+for argument in arguments:
+    if argument in ("--find-links", "--wheel-dir", "--python", "-r"):
+        next(arguments, None)
+    elif not argument.startswith("-"):
+        packages.append(argument)
+
+time.sleep(seconds) # Stands in for resolution and downloads
+out = sys.stdout
+err = sys.stderr
+stderr_written = 0
+for i in range(lines):
+    line = f"Collecting {packages[i % len(packages)] if packages else 'nothing'} (line {i})"
+    out.write(line.ljust(line_bytes - 1, ".") + "\\n")
+    # Like pip's warnings, which arrive on the other pipe while stdout is still being written
+    while stderr_written < (i + 1) * stderr_lines // lines:
+        err.write(f"WARNING: fake pip warning (line {stderr_written})".ljust(line_bytes - 1, ".") + "\\n")
+        stderr_written += 1
+if returncode == 0:
+    out.write("Successfully installed " + " ".join(f"{package}-1.0" for package in packages) + "\\n")
+else:
+    sys.stderr.write("ERROR: fake pip was told to fail\\n")
+sys.exit(returncode)
+'''
+
+
+def write_fake_pip(directory):
+    """Creates a `pip` package in `directory` that fakes `python -m pip`.
+
+    Put `directory` first on PYTHONPATH to make child processes use it instead of the real pip.
+    """
+    package_dir = os.path.join(directory, "pip")
+    os.makedirs(package_dir, exist_ok=True)
+    with open(os.path.join(package_dir, "__init__.py"), "w", encoding="utf-8") as f:
+        f.write("")
+    with open(os.path.join(package_dir, "__main__.py"), "w", encoding="utf-8") as f:
+        f.write(FAKE_PIP_MAIN)
+    return directory
+
+
+def make_wheel(directory, name, files, requires=(), version="1.0"):
+    """Writes a pure-Python wheel of `name` with the given {path: text} files. Returns its path."""
+    dist_info = f"{name}-{version}.dist-info"
+    files = dict(files)
+    files[f"{dist_info}/METADATA"] = f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n" + \
+        "".join(f"Requires-Dist: {requirement}\n" for requirement in requires)
+    files[f"{dist_info}/WHEEL"] = "Wheel-Version: 1.0\nGenerator: gemini-app-store-benchmarks\nRoot-Is-Purelib: true\nTag: py3-none-any\n"
+    record = []
+    for path, text in files.items():
+        data = text.encode("utf-8")
+        digest = base64.urlsafe_b64encode(hashlib.sha256(data).digest()).rstrip(b"=").decode("ascii")
+        record.append(f"{path},sha256={digest},{len(data)}")
+    record.append(f"{dist_info}/RECORD,,")
+    files[f"{dist_info}/RECORD"] = "\n".join(record) + "\n"
+
+    path = os.path.join(directory, f"{name}-{version}-py3-none-any.whl")
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as wheel:
+        for file_path, text in files.items():
+            wheel.writestr(file_path, text)
+    return path
+
+
+def make_package_index(directory, app_count, modules_per_app=5, shared_modules=20, module_bytes=20000):
+    """Generates wheels of `app_count` dummy apps (gemini_bench_000, ...) into `directory`.
+
+    Every app depends on gemini_bench_common, so installs share a dependency the way real
+    Gemini apps share google-generativeai. Returns the package names of the apps.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    def module_source(seed):
+        # Distinct, compilable source of about module_bytes bytes
+        body = "".join(f"def f_{seed}_{i}(x):\n    return x * {i} + {len(seed)}\n\n" for i in range(module_bytes // 40))
+        return f'"""Generated module {seed}."""\n\n{body}'
+
+    make_wheel(directory, "gemini_bench_common",
+               {f"gemini_bench_common/m{i}.py": module_source(f"common{i}") for i in range(shared_modules)} |
+               {"gemini_bench_common/__init__.py": ""})
+    package_names = []
+    for index in range(app_count):
+        name = f"gemini_bench_{index:03d}"
+        files = {f"{name}/m{i}.py": module_source(f"{name}_{i}") for i in range(modules_per_app)}
+        files[f"{name}/__init__.py"] = ""
+        files[f"{name}/__main__.py"] = "import gemini_bench_common\n"
+        make_wheel(directory, name, files, requires=["gemini_bench_common"])
+        package_names.append(name)
+    return package_names
+
+
+def make_catalog_file(path, app_count):
+    """Writes a catalog file with `app_count` generated apps. Returns its path."""
+    words = ["space", "arcade", "puzzle", "chat", "racing", "snake", "chess", "quiz", "music", "paint"]
+    apps = []
+    for index in range(app_count):
+        apps.append({
+            "display_name": f"Gemini {words[index % len(words)].title()} {index}",
+            "package_name": f"gemini_generated_{index}",
+            "module_name": f"gemini_generated_{index}",
+            "description": f"A {words[(index * 7) % len(words)]} game with {words[(index * 3) % len(words)]} powered by Gemini AI.",
+        })
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"format_version": 1, "apps": apps}, f)
+    return path
@@ -0,0 +1,133 @@
+"""
+A headless stand-in for the Tk main loop and Output pane of the application "Gemini AI App Store",
+so the queue-to-widget path of GeminiAppStore can be benchmarked without a display.
+HeadlessStore runs the real GeminiAppStore methods (_process_queue, _drain_queue, log_message,
+_flush_output) and the real WakeupQueue and OutputLog; only Tk itself is replaced.
+Author: SoftwareApkDev
+"""
+
+import collections
+import heapq
+import itertools
+import queue
+import time
+
+import main
+
+
+class HeadlessTk:
+    """The parts of the Tk event loop the store relies on: after(), after_idle() and wakeups from other threads.
+
+    Like Tk, idle callbacks only run once no timer or posted callback is due.
+    """
+    def __init__(self):
+        self._timers = [] # Heap of (due time, sequence number, callback)
+        self._sequence = itertools.count()
+        self._idle = collections.deque()
+        self._posted = queue.Queue() # Callbacks from other threads, standing in for the wakeup pipe
+
+    def after(self, ms, callback, *args):
+        heapq.heappush(self._timers, (time.perf_counter() + ms / 1000, next(self._sequence), lambda: callback(*args)))
+
+    def after_idle(self, callback, *args):
+        self._idle.append(lambda: callback(*args))
+
+    def post(self, callback):
+        """Runs `callback` on the loop's thread. May be called from any thread."""
+        self._posted.put(callback)
+
+    def winfo_exists(self):
+        return True
+
+    def run_until(self, done, timeout):
+        """Runs the loop until `done()` is true. Returns False if `timeout` seconds passed first."""
+        deadline = time.perf_counter() + timeout
+        while not done():
+            now = time.perf_counter()
+            if now >= deadline:
+                return False
+            ran = False
+            try:
+                while True:
+                    self._posted.get_nowait()()
+                    ran = True
+            except queue.Empty:
+                pass
+            while self._timers and self._timers[0][0] <= time.perf_counter():
+                heapq.heappop(self._timers)[2]()
+                ran = True
+            if ran:
+                continue
+            if self._idle:
+                for _ in range(len(self._idle)):
+                    self._idle.popleft()()
+                continue
+            # Nothing to do: sleep until the next timer or a wakeup, like Tk does
+            wait = deadline - now
+            if self._timers:
+                wait = min(wait, self._timers[0][0] - now)
+            try:
+                self._posted.get(timeout=max(0.0, wait))()
+            except queue.Empty:
+                pass
+        return True
+
+
+class HeadlessText:
+    """The parts of tk.Text that OutputLog uses. Only counts lines; `on_insert(text)` sees every insert."""
+    def __init__(self, on_insert=None):
+        self.on_insert = on_insert
+        self.line_count = 1 # Like Tk, an empty widget has one (empty) line
+        self.state = None
+
+    def config(self, state=None):
+        self.state = state
+
+    def insert(self, index, text):
+        self.line_count += text.count("\n")
+        if self.on_insert is not None:
+            self.on_insert(text)
+
+    def index(self, index):
+        # Only "end-1c" is used: the start of the last (empty) line
+        return f"{self.line_count}.0"
+
+    def delete(self, first, last):
+        self.line_count -= int(last.split(".")[0]) - int(first.split(".")[0])
+
+    def see(self, index):
+        pass
+
+
+class HeadlessStore(HeadlessTk):
+    """GeminiAppStore's event handling on top of HeadlessTk, with `engine` and an Output pane stand-in."""
+    _process_queue = main.GeminiAppStore._process_queue
+    _drain_queue = main.GeminiAppStore._drain_queue
+    log_message = main.GeminiAppStore.log_message
+    _flush_output = main.GeminiAppStore._flush_output
+
+    def __init__(self, engine, on_insert=None, log_file=None):
+        super().__init__()
+        self.engine = engine
+        self.output_queue = engine.event_bus.subscribe(main.WakeupQueue())
+        self.output_queue.wakeup = lambda: self.post(self._process_queue)
+        self.output_text = HeadlessText(on_insert)
+        self.output_log = main.OutputLog(self.output_text, log_file=log_file)
+        self._output_flush_scheduled = False
+        self.installed_state_refreshes = 0
+
+    # The app list and buttons are not part of the benchmark
+    def _refresh_installed_state(self):
+        self.installed_state_refreshes += 1
+
+    def enable_buttons(self):
+        pass
+
+    def _update_running_apps(self, apps):
+        pass
+
+    def close(self):
+        self.output_queue.wakeup = None
+        self.engine.event_bus.unsubscribe(self.output_queue)
+        self._flush_output()
+        self.output_log.close()
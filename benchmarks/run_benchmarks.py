@@ -0,0 +1,443 @@
+"""
+Offline benchmarks of the application "Gemini AI App Store": installs, output capture,
+queue-to-widget latency, catalog population and cold start.
+Everything runs against a throwaway home directory with generated `gemini_bench_*` wheels
+and, where the real pip is not the point, a fake pip with configurable output. No network is used.
+Results are written as JSON and compared against a stored baseline.
+Author: SoftwareApkDev
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import check_startup
+import fixtures
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+# A metric regresses when it is this much worse than its baseline.
+REGRESSION_THRESHOLD = 0.20
+
+# Workload sizes
+BENCH_APP_COUNT = 8
+CATALOG_APP_COUNT = 10000
+OUTPUT_LINES = 200000 # 100 bytes each, so 20 MB per run
+OUTPUT_STDERR_LINES = 50000 # Interleaved with them on the other pipe, another 5 MB
+OUTPUT_DEADLINE_SECONDS = 120 # A capture that stalls (e.g. on a full pipe) fails instead of hanging
+UI_EVENTS = 20000
+UI_BURST_SIZE = 20 # Events published back to back, like the lines of one pip output chunk
+UI_BURST_INTERVAL_SECONDS = 0.002
+COLD_START_RUNS = 3
+
+# Budgets the catalog benchmark fails on, for CATALOG_APP_COUNT apps. Loading and the first index
+# build parse and tokenize every entry in Python, so they take tens of ms; the store does both in the
+# background (load(background=True), warm_up()). Searching as you type only uses the index.
+CATALOG_LOAD_BUDGET_SECONDS = 0.1
+CATALOG_FIRST_SEARCH_BUDGET_SECONDS = 0.2
+CATALOG_SEARCH_BUDGET_MS = 5
+
+BENCHMARKS = {} # name -> function(context) returning {metric name: metric dict}
+
+
+def benchmark(name):
+    """Registers a benchmark function under `name`."""
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+    return register
+
+
+def metric(value, unit, better="lower"):
+    return {"value": value, "unit": unit, "better": better}
+
+
+class BenchmarkContext:
+    """The throwaway environment the benchmarks run in."""
+    def __init__(self, work_dir):
+        self.work_dir = work_dir
+        self.home = os.path.join(work_dir, "home")
+        self.fake_pip_dir = fixtures.write_fake_pip(os.path.join(work_dir, "fake_pip"))
+        self.app_packages = []
+
+    def prepare(self):
+        """Pre-seeds the store's wheel cache with the generated apps. Call after importing store_engine."""
+        import store_engine
+        self.app_packages = fixtures.make_package_index(store_engine.WHEEL_CACHE_DIR, BENCH_APP_COUNT)
+
+    @contextlib.contextmanager
+    def environment(self, **variables):
+        """Sets environment variables for child processes, restoring the environment afterwards."""
+        saved = dict(os.environ)
+        os.environ.update({name: str(value) for name, value in variables.items()})
+        try:
+            yield
+        finally:
+            os.environ.clear()
+            os.environ.update(saved)
+
+    def fake_pip(self, **settings):
+        """Makes `python -m pip` in child processes run the fake pip, configured by FAKE_PIP_* `settings`."""
+        return self.environment(PYTHONPATH=os.pathsep.join(filter(None, [self.fake_pip_dir, os.environ.get("PYTHONPATH")])), **settings)
+
+    def real_pip_target(self):
+        """Makes the real pip install into a new throwaway directory (PIP_TARGET), not this interpreter's environment."""
+        return self.environment(PIP_TARGET=tempfile.mkdtemp(prefix="pip-target-", dir=self.work_dir))
+
+
+def run_jobs(submit_all):
+    """Submits jobs with `submit_all()` and waits for them. Returns the elapsed seconds."""
+    started = time.perf_counter()
+    jobs = submit_all()
+    for job in jobs:
+        job.wait()
+    elapsed = time.perf_counter() - started
+    failed = [job for job in jobs if job.returncode != 0]
+    if failed:
+        raise RuntimeError(f"Benchmark jobs failed: {failed}")
+    return elapsed
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+@benchmark("install")
+def bench_install(context):
+    """Installs through StoreEngine._install_app: one app, then every app with one worker and with several.
+
+    With the real pip it then compares installing every app one pip call at a time with one batched call.
+    """
+    import store_engine
+    results = {}
+    packages = context.app_packages
+    # The fake pip stands in for resolving and downloading, so this measures the store's own overhead and concurrency
+    with context.fake_pip(FAKE_PIP_LINES=200, FAKE_PIP_SECONDS=0.2):
+        engine = store_engine.StoreEngine(max_workers=1, offline=True, isolated=False)
+        results["install.single_seconds"] = metric(run_jobs(lambda: [engine.install([packages[0]])]), "s")
+        results["install.sequential_seconds"] = metric(run_jobs(lambda: [engine.install([name]) for name in packages]), "s")
+        engine.shutdown()
+        engine = store_engine.StoreEngine(max_workers=store_engine.MAX_PARALLEL_JOBS, offline=True, isolated=False)
+        results["install.concurrent_seconds"] = metric(run_jobs(lambda: [engine.install([name]) for name in packages]), "s")
+        engine.shutdown()
+    results["install.concurrent_speedup"] = metric(
+        results["install.sequential_seconds"]["value"] / results["install.concurrent_seconds"]["value"], "x", "higher")
+
+    # The real pip, installing every app and their shared dependency from the wheel cache
+    engine = store_engine.StoreEngine(max_workers=1, offline=True, isolated=False)
+    with context.real_pip_target():
+        results["install.sequential_real_pip_seconds"] = metric(run_jobs(lambda: [engine.install([name]) for name in packages]), "s")
+    with context.real_pip_target():
+        results["install.batched_seconds"] = metric(run_jobs(lambda: [engine.install(packages)]), "s")
+    engine.shutdown()
+    results["install.batched_speedup"] = metric(
+        results["install.sequential_real_pip_seconds"]["value"] / results["install.batched_seconds"]["value"], "x", "higher")
+
+    # The real pip, installing one app and its dependency from the wheel cache into a fresh environment
+    engine = store_engine.StoreEngine(max_workers=1, offline=True, isolated=True)
+    results["install.isolated_real_pip_seconds"] = metric(run_jobs(lambda: [engine.install([packages[0]])]), "s")
+    engine.app_envs.remove(store_engine.normalize_package_name(packages[0]))
+    engine.shutdown()
+    return results
+
+
+@benchmark("output")
+def bench_output(context):
+    """Captures the output of a command on both pipes through CommandRunner while another thread drains the events."""
+    import store_engine
+    import store_telemetry
+    event_bus = store_engine.EventBus()
+    channel = event_bus.subscribe()
+
+    def consume():
+        while channel.get() is not None:
+            pass
+
+    consumer = threading.Thread(target=consume, daemon=True)
+    consumer.start()
+    # The runner counts the bytes it captures in the command_output_bytes_total metric
+    metrics = store_telemetry.MetricsRegistry()
+    runner = store_engine.CommandRunner(event_bus, tracer=store_telemetry.Tracer(metrics=metrics))
+    returncodes = []
+    capture = threading.Thread(target=lambda: returncodes.append(
+        runner.run_command([sys.executable, '-m', 'pip', 'install', 'gemini_bench_output'], 0)), daemon=True)
+    with context.fake_pip(FAKE_PIP_LINES=OUTPUT_LINES, FAKE_PIP_STDERR_LINES=OUTPUT_STDERR_LINES, FAKE_PIP_LINE_BYTES=100):
+        started = time.perf_counter()
+        capture.start()
+        capture.join(OUTPUT_DEADLINE_SECONDS)
+        elapsed = time.perf_counter() - started
+    stalled = capture.is_alive()
+    if stalled:
+        for process in list(runner._processes):
+            process.kill()
+    channel.put(None)
+    consumer.join()
+    if stalled:
+        raise RuntimeError(f"Capturing the output took longer than {OUTPUT_DEADLINE_SECONDS}s; is a pipe stalled?")
+    bytes_counter = metrics.counter("command_output_bytes_total", "")
+    output_bytes = bytes_counter.value(stream="stdout") + bytes_counter.value(stream="stderr")
+    rc = returncodes[0]
+    if rc != 0:
+        raise RuntimeError(f"The output benchmark command failed with return code {rc}")
+    return {
+        "output.seconds": metric(elapsed, "s"),
+        "output.throughput_mb_per_second": metric(output_bytes / (1024 * 1024) / elapsed, "MB/s", "higher"),
+    }
+
+
+class LatencyProbeText:
+    """Wraps the real tk.Text of the Output pane, reporting every insert to `on_insert(text)`."""
+    def __init__(self, text_widget, on_insert):
+        self._text_widget = text_widget
+        self._on_insert = on_insert
+
+    def insert(self, index, text):
+        self._text_widget.insert(index, text)
+        self._on_insert(text)
+
+    def __getattr__(self, name):
+        return getattr(self._text_widget, name)
+
+
+@benchmark("ui")
+def bench_ui(context):
+    """Measures the time from publishing an event to its text being inserted into the Output pane.
+
+    Uses the real GeminiAppStore if there is a display, and the headless stand-in otherwise.
+    """
+    import store_engine
+    latencies = []
+
+    def record(text):
+        now = time.perf_counter()
+        for line in text.splitlines():
+            if line.startswith("bench "):
+                latencies.append(now - float(line[len("bench "):]))
+
+    def produce(event_bus):
+        for _ in range(UI_EVENTS // UI_BURST_SIZE):
+            for _ in range(UI_BURST_SIZE):
+                event_bus.publish(store_engine.Progress(0, f"bench {time.perf_counter()!r}"))
+            time.sleep(UI_BURST_INTERVAL_SECONDS)
+
+    def done():
+        return len(latencies) >= UI_EVENTS
+
+    if check_startup.has_display():
+        import main
+        app = main.GeminiAppStore(offline=True)
+        app.output_log.text_widget = LatencyProbeText(app.output_text, record)
+        event_bus = app.engine.event_bus
+
+        def check():
+            if done():
+                app.quit()
+            else:
+                app.after(10, check)
+
+        app.after(10, check)
+        started = time.perf_counter()
+        threading.Thread(target=produce, args=(event_bus,), daemon=True).start()
+        app.mainloop()
+        elapsed = time.perf_counter() - started
+        app.engine.shutdown()
+        app.destroy()
+    else:
+        import headless_tk
+        engine = store_engine.StoreEngine(offline=True)
+        store = headless_tk.HeadlessStore(engine, on_insert=record)
+        started = time.perf_counter()
+        threading.Thread(target=produce, args=(engine.event_bus,), daemon=True).start()
+        if not store.run_until(done, timeout=120):
+            raise RuntimeError(f"Only {len(latencies)} of {UI_EVENTS} events reached the Output pane")
+        elapsed = time.perf_counter() - started
+        store.close()
+        engine.shutdown()
+    return {
+        "ui.latency_p50_ms": metric(percentile(latencies, 0.50) * 1000, "ms"),
+        "ui.latency_p95_ms": metric(percentile(latencies, 0.95) * 1000, "ms"),
+        "ui.latency_p99_ms": metric(percentile(latencies, 0.99) * 1000, "ms"),
+        "ui.latency_max_ms": metric(max(latencies) * 1000, "ms"),
+        "ui.events_per_second": metric(len(latencies) / elapsed, "events/s", "higher"),
+    }
+
+
+@benchmark("catalog")
+def bench_catalog(context):
+    """Loads a large catalog file and searches it, like the app list does when the store starts and as you type."""
+    import store_catalog
+    import store_engine
+    catalog_file = os.path.join(context.work_dir, f"catalog_{CATALOG_APP_COUNT}.json")
+    if not os.path.exists(catalog_file):
+        fixtures.make_catalog_file(catalog_file, CATALOG_APP_COUNT)
+    started = time.perf_counter()
+    catalog = store_catalog.AppCatalog(store_engine.AVAILABLE_APPS, catalog_file)
+    all_apps = catalog.search("")
+    load_seconds = time.perf_counter() - started
+    if len(all_apps) < CATALOG_APP_COUNT:
+        raise RuntimeError(f"Only {len(all_apps)} of {CATALOG_APP_COUNT} catalog apps were loaded")
+
+    started = time.perf_counter()
+    catalog.search("puzzle")
+    first_search_seconds = time.perf_counter() - started # Includes building the index
+
+    queries = ["p", "pu", "puz", "puzzle", "puzzle ch", "puzzle chat", "gemini", "racing 12", "nothing-matches"]
+    started = time.perf_counter()
+    for _ in range(10):
+        for query in queries:
+            catalog.search(query)
+    search_seconds = (time.perf_counter() - started) / (10 * len(queries))
+    over_budget = [f"{name} took {seconds * 1000:.1f} ms (budget {budget * 1000:.0f} ms)" for name, seconds, budget in [
+        ("Loading", load_seconds, CATALOG_LOAD_BUDGET_SECONDS),
+        ("The first search", first_search_seconds, CATALOG_FIRST_SEARCH_BUDGET_SECONDS),
+        ("A search", search_seconds, CATALOG_SEARCH_BUDGET_MS / 1000),
+    ] if seconds > budget]
+    if over_budget:
+        raise RuntimeError(f"Catalog of {CATALOG_APP_COUNT} apps is over budget: {'; '.join(over_budget)}")
+    return {
+        "catalog.load_seconds": metric(load_seconds, "s"),
+        "catalog.first_search_seconds": metric(first_search_seconds, "s"),
+        "catalog.search_ms": metric(search_seconds * 1000, "ms"),
+    }
+
+
+def time_command(command, runs=COLD_START_RUNS):
+    """Runs `command` from the repository directory `runs` times. Returns the fastest wall time."""
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=REPO_DIR, env=check_startup.child_environment(), check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+@benchmark("startup")
+def bench_startup(context):
+    """Starts fresh interpreters: importing the GUI, creating the engine, listing apps from the command line,
+    and, with a display, painting the GeminiAppStore window."""
+    results = {
+        "startup.import_main_seconds": metric(time_command([sys.executable, "-c", "import main"]), "s"),
+        "startup.engine_seconds": metric(time_command(
+            [sys.executable, "-c", "import store_engine; store_engine.StoreEngine(offline=True).shutdown()"]), "s"),
+        "startup.cli_list_seconds": metric(time_command([sys.executable, "store_cli.py", "list"]), "s"),
+    }
+    if check_startup.has_display():
+        # From starting the interpreter to the window being mapped, like check_startup.py measures it
+        profiles = [check_startup.measure_first_paint()[0] for _ in range(COLD_START_RUNS)]
+        first_paints = [profile["time_to_first_window"] for profile in profiles if profile["time_to_first_window"] is not None]
+        if not first_paints:
+            raise RuntimeError("The store window did not appear")
+        results["startup.first_paint_seconds"] = metric(min(first_paints), "s")
+    return results
+
+
+def run_benchmarks(context, names, repeat):
+    """Runs the benchmarks `repeat` times each. Returns {metric name: metric dict}, with each metric's median value."""
+    samples = {}
+    for name in names:
+        for run in range(repeat):
+            print(f"Running benchmark {name} ({run + 1}/{repeat})...", file=sys.stderr)
+            for metric_name, result in BENCHMARKS[name](context).items():
+                samples.setdefault(metric_name, []).append(result)
+    return {metric_name: dict(results[0], value=statistics.median(result["value"] for result in results))
+            for metric_name, results in samples.items()}
+
+
+def compare(metrics, baseline_metrics, threshold):
+    """Compares metrics with their baseline. Returns {metric name: comparison dict}."""
+    comparison = {}
+    for name, result in metrics.items():
+        baseline = baseline_metrics.get(name)
+        if baseline is None or not baseline["value"]:
+            continue
+        change = (result["value"] - baseline["value"]) / baseline["value"]
+        worse = change if result["better"] == "lower" else -change
+        comparison[name] = {"baseline": baseline["value"], "change": round(change, 4), "regressed": worse > threshold}
+    return comparison
+
+
+def format_report(report):
+    lines = []
+    for name, result in report["metrics"].items():
+        line = f"{name:40} {result['value']:12.4f} {result['unit']}"
+        comparison = report.get("comparison", {}).get(name)
+        if comparison is not None:
+            line += f"  ({comparison['change']:+.1%} vs. baseline{', REGRESSED' if comparison['regressed'] else ''})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Runs the offline benchmarks of the Gemini AI App Store.")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS), help="run only this benchmark (repeatable)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark; the median is reported (default: 3)")
+    parser.add_argument("--output", metavar="FILE", help="write the JSON results to FILE instead of stdout")
+    parser.add_argument("--baseline", metavar="FILE", default=DEFAULT_BASELINE_FILE,
+                        help="compare against the results in FILE (default: benchmarks/baseline.json, if it exists)")
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD,
+                        help=f"relative change that counts as a regression (default: {REGRESSION_THRESHOLD})")
+    parser.add_argument("--fail-on-regression", action="store_true", help="exit with status 1 if any metric regressed")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    names = args.only or list(BENCHMARKS)
+    work_dir = tempfile.mkdtemp(prefix="gemini-app-store-bench-")
+    try:
+        # The store keeps its data under the home directory, which it reads when store_engine is imported
+        context = BenchmarkContext(work_dir)
+        os.makedirs(context.home)
+        os.environ["HOME"] = os.environ["USERPROFILE"] = context.home
+        os.environ.pop("GEMINI_APP_STORE_CATALOG", None)
+        sys.path.insert(0, REPO_DIR)
+        context.prepare()
+        metrics = run_benchmarks(context, names, args.repeat)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "time": time.time(), "python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(), "repeat": args.repeat, "benchmarks": names,
+            "ui": "tk" if check_startup.has_display() else "headless",
+        },
+        "metrics": metrics,
+    }
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["comparison"] = compare(metrics, json.load(f)["metrics"], args.threshold)
+    print(format_report(report), file=sys.stderr)
+
+    text = json.dumps(report, indent=2) + "\n"
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        sys.stdout.write(text)
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"Saved the results as the baseline in {args.baseline}.", file=sys.stderr)
+    regressed = [name for name, comparison in report.get("comparison", {}).items() if comparison["regressed"]]
+    if regressed and args.fail_on_regression:
+        print(f"Regressed: {', '.join(regressed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,129 +5,322 @@ Author: SoftwareApkDev
 
 import tkinter as tk
 from tkinter import ttk, messagebox
+import tkinter.font as tkfont
 import subprocess
 import sys
 import threading
 import queue
+import os
+import time
+
+from store_engine import (
+    APP_STORE_PACKAGE_NAME, STORE_DATA_DIR, READ_CHUNK_SIZE, MAX_PARALLEL_JOBS, OFFLINE_MODE, ISOLATED_APPS,
+    StoreEngine, OutputChunk, Progress, JobError, JobStarted, JobFinished, AppExited, AppsSampled,
+    LaunchProfiled, EngineLoaded, format_output_chunk,
+)
+from store_launch import format_launch_profile
 
 # --- Configuration ---
 
-# Replace with your actual PyPi package name!
-# When you package this app store itself, this name should match your setup.py/pyproject.toml
-APP_STORE_PACKAGE_NAME = "gemini_ai_app_store"
-
-# Define the apps available in the store
-# Format: {"Display Name": {"package_name": "pypi-package-name", "module_name": "module_to_run_with_python_m"}}
-# module_name is optional if the app is just a library, but required to "Run" it.
-
-AVAILABLE_APPS = {
-    # Example: A hypothetical Gemini Chat app distributed as 'gemini_chat_app' on PyPi
-    # and runnable with 'python -m gemini_chat_app'
-    "Gemini Chat App": {"package_name": "gemini_chat_app", "module_name": "gemini_chat_app"},
-    "Gemini Geometry Wars": {"package_name": "gemini_geometry_wars", "module_name": "gemini_geometry_wars"},
-    "Gemini Breakout": {"package_name": "gemini_breakout", "module_name": "gemini_breakout"},
-    "Gemini Agar.io": {"package_name": "gemini_agario", "module_name": "gemini_agario"},
-    "Gemini Outrun": {"package_name": "gemini_outrun", "module_name": "gemini_outrun"},
-    "Gemini Pong": {"package_name": "gemini_pong", "module_name": "gemini_pong"},
-    # Add more Gemini-integrated apps here.
-    # REMEMBER: These package_names must exist on PyPi, and module_names must be runnable.
-}
-
-# --- Helper Functions ---
-
-class CommandRunner:
-    """Helper to run commands in a separate thread and update the GUI safely."""
-    def __init__(self, output_queue, log_callback, enable_buttons_callback):
-        self.output_queue = output_queue
-        self.log_callback = log_callback
-        self.enable_buttons_callback = enable_buttons_callback
-        self._stop_event = threading.Event()
-        self._current_process = None # Keep track of the current process if needed
-
-    def run_command(self, command, package_name):
-        """Runs a command in a subprocess and puts output/result in the queue."""
-        self.output_queue.put(f"--> Running command: {' '.join(command)}\n")
-        process = None
-        try:
-            # Use shell=True on Windows for .bat, .cmd files, but generally avoid it.
-            # Here we are running python -m, which doesn't need shell=True.
-            # Using text=True is preferred over universal_newlines=True in newer Python.
-            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            self._current_process = process # Store the process
-
-            # Read stdout and stderr in real-time
-            # This loop can block if the process produces a lot of output and the pipe fills up
-            # For robustness, especially with long-running outputs, consider using select/poll
-            # or separate threads for stdout/stderr, but this is sufficient for typical pip output.
-            while True:
-                stdout_line = process.stdout.readline()
-                stderr_line = process.stderr.readline()
-
-                # Check if process has exited and pipes are empty
-                if not stdout_line and not stderr_line and process.poll() is not None:
-                    break
-
-                if stdout_line:
-                    self.output_queue.put(stdout_line)
-                if stderr_line:
-                    self.output_queue.put(f"[ERROR] {stderr_line}") # Differentiate errors
-
-                # Small sleep to prevent a tight loop from consuming CPU if pipes are empty
-                if not stdout_line and not stderr_line:
-                     threading.sleep(0.01)
-
-                # Check stop event if you want to be able to cancel commands
-                # if self._stop_event.is_set():
-                #     if process and process.poll() is None:
-                #         process.terminate() # or process.kill()
-                #     self.output_queue.put(("[CANCELLED]", package_name, -1))
-                #     return
-
-            rc = process.wait() # Wait for the process to finish after pipes are read
-            self.output_queue.put(f"<-- Command finished with return code: {rc}\n")
-            self.output_queue.put(("DONE", package_name, rc)) # Signal command completion
-
-        except FileNotFoundError:
-            self.output_queue.put(f"[ERROR] Command not found. Make sure Python and pip are in your PATH.\n")
-            self.output_queue.put(("DONE", package_name, 1)) # Signal failure
-        except Exception as e:
-            self.output_queue.put(f"[ERROR] An unexpected error occurred: {e}\n")
-            self.output_queue.put(("DONE", package_name, 1)) # Signal failure
-        finally:
-            self._current_process = None # Clear the stored process
-            # Ensure buttons are re-enabled even if there's an exception within the thread
-            self.output_queue.put(("FINISH_THREAD", None, None))
+# The Output pane only keeps the most recent OUTPUT_MAX_LINES lines so long pip logs stay cheap to render.
+# Everything is also written to a rotating log file that can be opened from the UI.
+OUTPUT_MAX_LINES = 5000
+OUTPUT_LOG_FILE = os.path.join(STORE_DATA_DIR, "logs", "output.log")
+OUTPUT_LOG_MAX_BYTES = 5 * 1024 * 1024
+OUTPUT_LOG_BACKUP_COUNT = 3
 
+# Longest time a single queue-draining tick may spend handling worker output before yielding
+# back to the Tk event loop, so a flood of output can never starve user input.
+QUEUE_DRAIN_BUDGET_SECONDS = 0.015
 
 # --- GUI Application ---
 
+class WakeupQueue(queue.Queue):
+    """queue.Queue that calls `wakeup()` when an item arrives while its consumer is idle.
+
+    Only the first put() after the consumer called acknowledge() triggers a wakeup, so a
+    burst of output costs a single wakeup rather than one per item.
+    """
+    def __init__(self, maxsize=0):
+        super().__init__(maxsize)
+        self.wakeup = None # Set by the consumer; called from whichever thread puts the item
+        self._wakeup_lock = threading.Lock()
+        self._wakeup_pending = False
+
+    def put(self, item, block=True, timeout=None):
+        super().put(item, block, timeout)
+        with self._wakeup_lock:
+            wakeup = self.wakeup # The consumer may clear it at any moment, so call the one seen here
+            if self._wakeup_pending or wakeup is None:
+                return
+            self._wakeup_pending = True
+        wakeup()
+
+    def acknowledge(self):
+        """Called by the consumer before it drains, so later puts wake it up again."""
+        with self._wakeup_lock:
+            self._wakeup_pending = False
+
+
+class OutputLog:
+    """Sink for the Output text widget.
+
+    Messages are buffered and written with a single insert per flush, after which the widget
+    is trimmed to the last `max_lines` lines. The full log goes to a rotating file on disk.
+    """
+    def __init__(self, text_widget, max_lines=OUTPUT_MAX_LINES, log_file=OUTPUT_LOG_FILE):
+        self.text_widget = text_widget
+        self.max_lines = max_lines
+        self.log_file = log_file
+        self._pending = []
+        self._file_handler = None
+
+    def write(self, message):
+        """Buffers a message; it shows up on the next flush()."""
+        # Ensure message ends with newline if it doesn't already
+        if not message.endswith('\n'):
+             message += '\n'
+        self._pending.append(message)
+
+    def pending(self):
+        """Returns the number of messages waiting for the next flush()."""
+        return len(self._pending)
+
+    def flush(self):
+        """Writes all buffered messages to the widget and the log file at once."""
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending.clear()
+
+        self.text_widget.config(state=tk.NORMAL)
+        self.text_widget.insert(tk.END, text)
+        # The widget always holds a trailing newline, so "end-1c" is on the last real line
+        line_count = int(self.text_widget.index("end-1c").split(".")[0])
+        if line_count > self.max_lines:
+            self.text_widget.delete("1.0", f"{line_count - self.max_lines + 1}.0")
+        self.text_widget.see(tk.END) # Auto-scroll to the bottom
+        self.text_widget.config(state=tk.DISABLED)
+
+        self._write_to_file(text)
+
+    def _write_to_file(self, text):
+        if self.log_file is None:
+            return
+        import logging.handlers
+        if self._file_handler is None:
+            try:
+                os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+                self._file_handler = logging.handlers.RotatingFileHandler(
+                    self.log_file, maxBytes=OUTPUT_LOG_MAX_BYTES, backupCount=OUTPUT_LOG_BACKUP_COUNT, encoding="utf-8")
+            except OSError:
+                self.log_file = None # Keep the UI working without a log file
+                return
+            self._file_handler.terminator = "" # Messages already carry their newlines
+        self._file_handler.emit(logging.makeLogRecord({"msg": text}))
+
+    def open_log_file(self):
+        """Opens the full log file with the system's default viewer."""
+        if self._file_handler is not None:
+            self._file_handler.flush()
+        if not self.log_file or not os.path.exists(self.log_file):
+            return False
+        import shutil
+        import webbrowser
+        if sys.platform.startswith("win"):
+            os.startfile(self.log_file)
+        elif sys.platform == "darwin":
+            subprocess.Popen(["open", self.log_file])
+        elif shutil.which("xdg-open"):
+            subprocess.Popen(["xdg-open", self.log_file])
+        else:
+            webbrowser.open(f"file://{self.log_file}")
+        return True
+
+    def close(self):
+        if self._file_handler is not None:
+            self._file_handler.close()
+            self._file_handler = None
+
+
+class VirtualListbox(ttk.Frame):
+    """A listbox that only materializes the rows currently on screen.
+
+    Holds any number of items but the inner tk.Listbox only ever contains the visible rows,
+    formatted on demand by `format_row(item)`. Selection is tracked by item index and works
+    like selectmode=EXTENDED (click, Ctrl-click, Shift-click, arrow keys). Like tk.Listbox,
+    it generates <<ListboxSelect>> when the selection changes.
+    """
+    def __init__(self, master, format_row=str, **listbox_options):
+        super().__init__(master)
+        self.format_row = format_row
+        self.items = []
+        self._first = 0 # Index of the item shown in the top row
+        self._selected = set()
+        self._anchor = None # Item index Shift-click ranges start from
+
+        self.listbox = tk.Listbox(self, selectmode=tk.EXTENDED, exportselection=False, **listbox_options)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self._line_height = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace") + 1
+
+        self.listbox.bind("<Configure>", lambda event: self._render())
+        self.listbox.bind("<Button-1>", lambda event: self._on_click(event, "set"))
+        self.listbox.bind("<Control-Button-1>", lambda event: self._on_click(event, "toggle"))
+        self.listbox.bind("<Shift-Button-1>", lambda event: self._on_click(event, "range"))
+        self.listbox.bind("<B1-Motion>", lambda event: "break")
+        self.listbox.bind("<MouseWheel>", lambda event: self._scroll(-1 if event.delta > 0 else 1, "units", 3))
+        self.listbox.bind("<Button-4>", lambda event: self._scroll(-1, "units", 3)) # X11 wheel up
+        self.listbox.bind("<Button-5>", lambda event: self._scroll(1, "units", 3)) # X11 wheel down
+        self.listbox.bind("<Up>", lambda event: self._on_arrow(-1, event))
+        self.listbox.bind("<Down>", lambda event: self._on_arrow(1, event))
+        self.listbox.bind("<Prior>", lambda event: self._scroll(-1, "pages"))
+        self.listbox.bind("<Next>", lambda event: self._scroll(1, "pages"))
+        self.listbox.bind("<Control-a>", lambda event: self._select(set(range(len(self.items)))))
+
+    def set_items(self, items):
+        """Replaces the items, keeping the selected ones that are still present."""
+        selected_items = {self.items[index] for index in self._selected}
+        self.items = list(items)
+        self._selected = {index for index, item in enumerate(self.items) if item in selected_items}
+        self._anchor = None
+        self._first = 0
+        self._render()
+
+    def refresh(self):
+        """Reformats the visible rows, e.g. after the data behind format_row changed."""
+        self._render()
+
+    def curselection(self):
+        """Returns the indices (into `items`) of the selected items, like tk.Listbox.curselection()."""
+        return tuple(sorted(self._selected))
+
+    def get(self, index):
+        return self.items[index]
+
+    def _visible_rows(self):
+        return max(1, self.listbox.winfo_height() // self._line_height)
+
+    def _render(self):
+        visible_rows = self._visible_rows()
+        self._first = max(0, min(self._first, len(self.items) - visible_rows))
+        last = min(len(self.items), self._first + visible_rows + 1) # One extra, possibly half visible, row
+        self.listbox.delete(0, tk.END)
+        if last > self._first:
+            self.listbox.insert(0, *(self.format_row(item) for item in self.items[self._first:last]))
+        for index in self._selected:
+            if self._first <= index < last:
+                self.listbox.selection_set(index - self._first)
+        if self.items:
+            self.scrollbar.set(self._first / len(self.items), min(1.0, (self._first + visible_rows) / len(self.items)))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self._first = int(float(amount) * len(self.items))
+            self._render()
+        else:
+            self._scroll(int(amount), unit)
+
+    def _scroll(self, direction, unit, count=1):
+        step = self._visible_rows() if unit == "pages" else 1
+        self._first += direction * step * count
+        self._render()
+        return "break"
+
+    def _on_click(self, event, mode):
+        self.listbox.focus_set()
+        index = self._first + self.listbox.nearest(event.y)
+        if not self.items or index >= len(self.items):
+            return "break"
+        if mode == "toggle":
+            self._select(self._selected ^ {index})
+        elif mode == "range" and self._anchor is not None:
+            low, high = sorted((self._anchor, index))
+            self._select(set(range(low, high + 1)))
+        else:
+            self._select({index})
+        if mode != "range" or self._anchor is None:
+            self._anchor = index
+        return "break"
+
+    def _on_arrow(self, direction, event):
+        if not self.items:
+            return "break"
+        current = self._anchor if self._anchor is not None else self._first - direction
+        index = max(0, min(len(self.items) - 1, current + direction))
+        self._anchor = index
+        # Keep the newly selected row on screen
+        if index < self._first:
+            self._first = index
+        elif index >= self._first + self._visible_rows():
+            self._first = index - self._visible_rows() + 1
+        self._select({index})
+        return "break"
+
+    def _select(self, selected):
+        self._selected = selected
+        self._render()
+        self.event_generate("<<ListboxSelect>>")
+        return "break"
+
+
 class GeminiAppStore(tk.Tk):
-    def __init__(self):
+    def __init__(self, max_workers=MAX_PARALLEL_JOBS, offline=OFFLINE_MODE, isolated=ISOLATED_APPS):
         super().__init__()
 
         self.title("Gemini App Store")
         self.geometry("900x720")
 
-        self.output_queue = queue.Queue()
-        self.command_runner = CommandRunner(self.output_queue, self.log_message, self.enable_buttons)
+        # The window is painted first: the catalog file and the installed packages are only
+        # read once it is on screen, in the background, and fill in the app list when ready
+        self.engine = StoreEngine(max_workers, offline, isolated=isolated, load=False)
+        # The GUI sees every event through this queue; workers never read from it
+        self.output_queue = self.engine.event_bus.subscribe(WakeupQueue())
+        self._listed_apps = [] # Display names in listbox order
 
         self._setup_widgets()
+        self._populate_app_list() # The built-in apps, until the engine has loaded the catalog file
+        if self.engine.isolated:
+            self.log_message(f"Isolated mode: every app is installed into its own environment in {self.engine.app_envs.envs_dir}.\n")
+        self._setup_queue_wakeup() # Worker threads wake the main loop instead of it polling the queue
+        self._process_queue()
+        self._startup_finished = False
+        self.bind("<Map>", self._on_map, add="+")
+
+    def _on_map(self, event):
+        # Child widgets share the window's bindings, so only react to the window itself, once
+        if event.widget is self and not self._startup_finished:
+            self._startup_finished = True
+            self.after_idle(self._finish_startup)
+
+    def _finish_startup(self):
+        """Runs once the window is on screen and starts loading what it does not need to appear."""
+        self.engine.load(background=True)
+
+    def _on_engine_loaded(self, event):
+        """Fills in the app list once the engine has loaded the catalog file and the installed packages."""
+        if event.catalog_error:
+            self.log_message(f"[ERROR] {event.catalog_error}\n")
         self._populate_app_list()
-        self._process_queue() # Start checking the queue for updates
+        self.enable_buttons()
 
     def _setup_widgets(self):
-        # Frame for the listbox and scrollbar
-        list_frame = ttk.Frame(self)
-        list_frame.pack(pady=10, padx=10, fill=tk.BOTH, expand=True)
-
-        self.app_listbox = tk.Listbox(list_frame, width=50, height=10, selectmode=tk.SINGLE) # Use SINGLE select mode
-        self.app_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        # Search box filtering the app list as you type
+        filter_frame = ttk.Frame(self)
+        filter_frame.pack(pady=(10, 0), padx=10, fill=tk.X)
+        ttk.Label(filter_frame, text="Search:").pack(side=tk.LEFT)
+        self.filter_var = tk.StringVar()
+        self.filter_var.trace_add("write", lambda *args: self._populate_app_list())
+        ttk.Entry(filter_frame, textvariable=self.filter_var).pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+
+        # The app list only creates the rows on screen, so it stays fast with very large catalogs
+        self.app_listbox = VirtualListbox(self, format_row=self._format_app_row, width=50, height=10) # Shift/Ctrl-click to select several apps
+        self.app_listbox.pack(pady=10, padx=10, fill=tk.BOTH, expand=True)
         self.app_listbox.bind('<<ListboxSelect>>', self._on_listbox_select)
 
-        scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.app_listbox.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.app_listbox.config(yscrollcommand=scrollbar.set)
-
         # Frame for buttons
         button_frame = ttk.Frame(self)
         button_frame.pack(pady=10)
@@ -141,6 +334,34 @@ class GeminiAppStore(tk.Tk):
         self.run_button = ttk.Button(button_frame, text="Run Selected", command=self._start_run_selected, state=tk.DISABLED)
         self.run_button.grid(row=0, column=2, padx=5)
 
+        # Runs the app with -X importtime and reports its time to first window and slowest imports
+        self.profile_button = ttk.Button(button_frame, text="Profile Launch", command=lambda: self._start_run_selected(profile=True), state=tk.DISABLED)
+        self.profile_button.grid(row=0, column=3, padx=5)
+
+        self.offline_var = tk.BooleanVar(value=self.engine.offline)
+        offline_check = ttk.Checkbutton(button_frame, text="Offline mode (install from wheel cache only)",
+                                        variable=self.offline_var, command=self._on_offline_toggled)
+        offline_check.grid(row=0, column=4, padx=5)
+
+        open_log_button = ttk.Button(button_frame, text="Open Full Log", command=self._open_full_log)
+        open_log_button.grid(row=0, column=5, padx=5)
+
+        # Running apps, refreshed by the process supervisor's samples
+        running_frame = ttk.LabelFrame(self, text="Running apps")
+        running_frame.pack(padx=10, pady=5, fill=tk.X)
+
+        columns = ("app", "pid", "cpu", "memory", "uptime")
+        self.running_tree = ttk.Treeview(running_frame, columns=columns, show="headings", height=4, selectmode=tk.EXTENDED)
+        for column, heading, width in zip(columns, ("App", "PID", "CPU %", "Memory", "Uptime"), (250, 80, 80, 100, 100)):
+            self.running_tree.heading(column, text=heading)
+            self.running_tree.column(column, width=width, anchor=tk.W if column == "app" else tk.E)
+        self.running_tree.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        running_buttons = ttk.Frame(running_frame)
+        running_buttons.pack(side=tk.LEFT, padx=5)
+        ttk.Button(running_buttons, text="Stop", command=lambda: self._stop_selected_apps(kill=False)).pack(fill=tk.X, pady=2)
+        ttk.Button(running_buttons, text="Kill", command=lambda: self._stop_selected_apps(kill=True)).pack(fill=tk.X, pady=2)
+
         # Output area
         output_frame = ttk.LabelFrame(self, text="Output")
         output_frame.pack(padx=10, pady=5, fill=tk.BOTH, expand=True)
@@ -152,263 +373,319 @@ class GeminiAppStore(tk.Tk):
 
         output_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.output_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.output_log = OutputLog(self.output_text)
+        self._output_flush_scheduled = False
 
 
     def _populate_app_list(self):
-        """Populates the listbox with available app display names."""
-        for display_name in AVAILABLE_APPS:
-            self.app_listbox.insert(tk.END, display_name)
+        """Populates the listbox with the catalog apps matching the search box."""
+        self.engine.reload_catalog() # Only stats the catalog file unless it changed; errors arrive as JobError events
+        self._listed_apps = self.engine.catalog.search(self.filter_var.get())
+        self.app_listbox.set_items(self._listed_apps)
+
+    def _format_app_row(self, display_name):
+        """Formats a listbox row, e.g. 'Gemini Pong  [installed 1.0]'."""
+        if not self.engine.loaded.is_set():
+            return f"{display_name}  [checking...]"
+        version = self.engine.installed_index.version(self.engine.catalog.get(display_name, {}).get("package_name", ""))
+        status = f"installed {version}" if version else "not installed"
+        return f"{display_name}  [{status}]"
+
+    def _refresh_installed_state(self):
+        """Updates listbox rows and buttons if packages were installed/uninstalled since the last check."""
+        if not self.engine.loaded.is_set():
+            return # The first scan is still running in the background; never do it on the main thread
+        if not self.engine.installed_index.refresh():
+            return
+        self.app_listbox.refresh() # Only the visible rows are reformatted
+        self.enable_buttons()
 
     def _on_listbox_select(self, event):
         """Enable buttons when an item is selected."""
+        self._refresh_installed_state() # Only stats a few directories unless something changed
         selected_indices = self.app_listbox.curselection()
         if selected_indices:
             self.enable_buttons()
         else:
             self.disable_buttons()
 
+    def _on_offline_toggled(self):
+        self.engine.offline = self.offline_var.get()
+        self.log_message(f"Offline mode {'enabled' if self.engine.offline else 'disabled'}.\n")
+
     def disable_buttons(self):
         """Disables all action buttons."""
         self.install_button.config(state=tk.DISABLED)
         self.uninstall_button.config(state=tk.DISABLED)
         self.run_button.config(state=tk.DISABLED)
+        self.profile_button.config(state=tk.DISABLED)
 
     def enable_buttons(self):
-        """Enables buttons if an item is selected."""
+        """Enables the buttons that make sense for the selected apps' installed state."""
         selected_indices = self.app_listbox.curselection()
-        if selected_indices:
-            self.install_button.config(state=tk.NORMAL)
-            self.uninstall_button.config(state=tk.NORMAL)
-            self.run_button.config(state=tk.NORMAL)
+        if selected_indices and self.engine.loaded.is_set():
+            installed = [self.engine.installed_index.is_installed(self.engine.catalog.get(self._listed_apps[index], {}).get("package_name", ""))
+                         for index in selected_indices]
+            # Install while anything selected is missing; Uninstall/Run once something is installed
+            self.install_button.config(state=tk.NORMAL if not all(installed) else tk.DISABLED)
+            self.uninstall_button.config(state=tk.NORMAL if any(installed) else tk.DISABLED)
+            self.run_button.config(state=tk.NORMAL if any(installed) else tk.DISABLED)
+            self.profile_button.config(state=tk.NORMAL if any(installed) else tk.DISABLED)
         else:
-             self.disable_buttons() # Should already be disabled, but good practice
+             self.disable_buttons() # Nothing selected, or the installed packages are not known yet
 
     def log_message(self, message):
-        """Appends a message to the output text area."""
-        self.output_text.config(state=tk.NORMAL)
-        # Ensure message ends with newline if it doesn't already
-        if not message.endswith('\n'):
-             message += '\n'
-        self.output_text.insert(tk.END, message)
-        self.output_text.see(tk.END) # Auto-scroll to the bottom
-        self.output_text.config(state=tk.DISABLED)
+        """Appends a message to the output text area.
+
+        Messages are coalesced and rendered together once the current event has been handled.
+        """
+        self.output_log.write(message)
+        if not self._output_flush_scheduled:
+            self._output_flush_scheduled = True
+            self.after_idle(self._flush_output)
+
+    def _flush_output(self):
+        self._output_flush_scheduled = False
+        if self.output_log.pending():
+            with self.engine.tracer.span("ui.render_output", messages=self.output_log.pending()):
+                self.output_log.flush()
+
+    def _open_full_log(self):
+        self._flush_output()
+        if not self.output_log.open_log_file():
+            self.log_message("The output log file is not available.\n")
 
     def _get_selected_app_info(self):
-        """Gets the package and module name for the selected app."""
+        """Gets the package and module name for the (first) selected app."""
+        selected_apps = self._get_selected_apps_info()
+        if not selected_apps:
+            return None, None, None
+        return selected_apps[0]
+
+    def _get_selected_apps_info(self):
+        """Gets (display_name, package_name, module_name) for every selected app."""
         selected_indices = self.app_listbox.curselection()
         if not selected_indices:
             self.log_message("Please select an application first.\n")
-            return None, None, None
-
-        index = selected_indices[0]
-        display_name = self.app_listbox.get(index)
-        app_info = AVAILABLE_APPS.get(display_name)
-
-        if app_info:
-            # Ensure package_name is always present
-            package_name = app_info.get("package_name")
-            if not package_name:
-                 self.log_message(f"[ERROR] Configuration error: 'package_name' missing for '{display_name}'.\n")
-                 return None, None, None
-            module_name = app_info.get("module_name") # module_name might be optional if only installing
-            return display_name, package_name, module_name
-        else:
-            self.log_message(f"Error: Could not find info for selected app: {display_name}\n")
-            return None, None, None
+            return []
+
+        selected_apps = []
+        for index in selected_indices:
+            display_name = self._listed_apps[index]
+            app_info = self.engine.catalog.get(display_name)
+
+            if app_info:
+                # Ensure package_name is always present
+                package_name = app_info.get("package_name")
+                if not package_name:
+                     self.log_message(f"[ERROR] Configuration error: 'package_name' missing for '{display_name}'.\n")
+                     continue
+                module_name = app_info.get("module_name") # module_name might be optional if only installing
+                selected_apps.append((display_name, package_name, module_name))
+            else:
+                self.log_message(f"Error: Could not find info for selected app: {display_name}\n")
+        return selected_apps
 
     def _start_install_selected(self):
-        """Initiates the installation process in a separate thread."""
-        display_name, package_name, _ = self._get_selected_app_info()
-        if package_name:
-            self.log_message(f"Attempting to install: {display_name} ({package_name})\n")
-            self.disable_buttons()
-
-            # Create a thread to run the installation commands
-            thread = threading.Thread(target=self._install_app, args=(package_name,))
-            thread.daemon = True # Allow the main thread to exit even if this is running
-            thread.start()
-
-    def _install_app(self, target_package):
-        """Installs the app store itself, then the target app."""
-        # Step 1: Ensure the app store is installed/upgraded from PyPi
-        # This ensures the user has the latest version of the store itself.
-        self.log_message(f"Ensuring {APP_STORE_PACKAGE_NAME} is installed/upgraded from PyPi...\n")
-        # Use --break-system-packages if needed on Python 3.11+ in virtual environments
-        # where the venv might "inherit" global site-packages
-        # Add --user if installing outside a venv and without root, though venv is recommended
-        store_install_command = [sys.executable, '-m', 'pip', 'install', '--upgrade', APP_STORE_PACKAGE_NAME]
-        if sys.version_info >= (3, 11):
-             # Add --break-system-packages for newer Python versions in certain environments
-             # This might be needed if installing into a venv that copies system packages
-             # Use with caution. Alternatively, ensure you are in a clean venv.
-             # store_install_command.append('--break-system-packages')
-             pass # Not adding by default, user should manage environment
-
-        # Run the store install command and wait for its completion signal from the runner
-        self.command_runner.run_command(store_install_command, f"STORE_{APP_STORE_PACKAGE_NAME}") # Use a unique identifier for the queue signal
-
-        store_install_success = False
-        # Wait for the store install command to finish signal in the queue
-        # A more robust approach would track command IDs, but this simple loop works
-        # for sequential commands where the next step depends on the previous one's result.
-        while True:
-            try:
-                # Use a small timeout to allow the GUI thread to process other events
-                item = self.output_queue.get(timeout=0.05)
-                if isinstance(item, tuple) and item[0] == "DONE" and item[1] == f"STORE_{APP_STORE_PACKAGE_NAME}":
-                    if item[2] != 0:
-                        self.log_message(f"[ERROR] Failed to install/upgrade {APP_STORE_PACKAGE_NAME} (Return Code: {item[2]}). Aborting installation of {target_package}.\n")
-                        # Signal thread completion explicitly here as we are returning early
-                        self.output_queue.put(("FINISH_THREAD", None, None))
-                        return # Stop installation process
-                    else:
-                        self.log_message(f"{APP_STORE_PACKAGE_NAME} installed/upgraded successfully.\n")
-                        store_install_success = True
-                        break # Continue with target app installation
-                elif isinstance(item, str):
-                     # Log regular messages from the command runner during the wait
-                     self.log_message(item)
-                elif isinstance(item, tuple) and item[0] == "FINISH_THREAD":
-                     # If the runner signaled thread finish unexpectedly (e.g., FileNotFoundError), stop.
-                     if not store_install_success: # Only stop if the store wasn't successfully installed
-                        self.log_message(f"[ERROR] Runner thread finished unexpectedly during store installation. Aborting.\n")
-                        return
-                     # If store install was success, the FINISH_THREAD might be the one *we* put. Continue.
-
-            except queue.Empty:
-                 pass # Keep checking
-
-            # Add a mechanism to stop if the main window is closed
-            # if not self.winfo_exists(): return
-
-        # Step 2: Install the selected application
-        self.log_message(f"Installing {target_package}...\n")
-        install_command = [sys.executable, '-m', 'pip', 'install', target_package]
-        # Again, add --break-system-packages if needed for the target app
-        # if sys.version_info >= (3, 11):
-        #     install_command.append('--break-system-packages')
-
-        self.command_runner.run_command(install_command, target_package)
-        # The runner's finally block will put FINISH_THREAD after this command finishes
+        """Queues an installation job for the selected app(s).
 
+        Several selected apps are installed together by a single batched pip invocation.
+        """
+        selected_apps = []
+        for display_name, package_name, module_name in self._get_selected_apps_info():
+            version = self.engine.installed_index.version(package_name)
+            if version:
+                self.log_message(f"{display_name} is already installed (version {version}), skipping.\n")
+            else:
+                selected_apps.append((display_name, package_name, module_name))
+        if len(selected_apps) == 1:
+            display_name, package_name, _ = selected_apps[0]
+            # Jobs run on the scheduler's worker pool, so other apps can be installed meanwhile
+            job = self.engine.install([package_name])
+            self.log_message(f"Queued job #{job.job_id}: install {display_name} ({package_name})\n")
+        elif selected_apps:
+            package_names = [package_name for _, package_name, _ in selected_apps]
+            job = self.engine.install(package_names)
+            self.log_message(f"Queued job #{job.job_id}: install {', '.join(name for name, _, _ in selected_apps)} in one batch\n")
 
     def _start_uninstall_selected(self):
-        """Initiates the uninstallation process in a separate thread."""
-        display_name, package_name, _ = self._get_selected_app_info()
-        if package_name:
+        """Queues an uninstallation job for each selected app."""
+        for display_name, package_name, _ in self._get_selected_apps_info():
+            if not self.engine.installed_index.is_installed(package_name):
+                self.log_message(f"{display_name} is not installed, nothing to uninstall.\n")
+                continue
             confirm = messagebox.askyesno("Confirm Uninstall", f"Are you sure you want to uninstall {display_name} ({package_name})?")
             if confirm:
-                self.log_message(f"Attempting to uninstall: {display_name} ({package_name})\n")
-                self.disable_buttons()
-
-                # Create a thread to run the uninstallation command
-                thread = threading.Thread(target=self._uninstall_app, args=(package_name,))
-                thread.daemon = True
-                thread.start()
-
-    def _uninstall_app(self, package_name):
-        """Uninstalls the specified application."""
-        # Use -y to avoid interactive confirmation
-        uninstall_command = [sys.executable, '-m', 'pip', 'uninstall', package_name, '-y']
-        self.command_runner.run_command(uninstall_command, package_name)
-        # The runner's finally block will put FINISH_THREAD
-
-
-    def _start_run_selected(self):
-        """Initiates running the application in a separate thread."""
-        display_name, package_name, module_name = self._get_selected_app_info()
-        if package_name:
+                job = self.engine.uninstall(package_name)
+                self.log_message(f"Queued job #{job.job_id}: uninstall {display_name} ({package_name})\n")
+
+    def _start_run_selected(self, profile=False):
+        """Queues a job that launches each selected app, profiling the launch if `profile` is set."""
+        for display_name, package_name, module_name in self._get_selected_apps_info():
+            if not self.engine.installed_index.is_installed(package_name):
+                self.log_message(f"{display_name} is not installed. Install it first.\n")
+                continue
             if not module_name:
-                self.log_message(f"[ERROR] Cannot run {display_name}. No runnable module name ('module_name') specified in AVAILABLE_APPS config.\n")
-                # Manually enable buttons since no thread was started
-                self.enable_buttons()
-                return
+                self.log_message(f"[ERROR] Cannot run {display_name}. No runnable module name ('module_name') specified in the app catalog.\n")
+                continue
 
-            self.log_message(f"Attempting to run: {display_name} (module: {module_name})\n")
-            self.disable_buttons() # Disable while launching (process runs separately)
-
-            # Create a thread to run the application command
-            # Note: This thread will launch the target application as a subprocess.
+            # Note: The job only launches the target application as a subprocess.
             # If the target application is a GUI, it will open its own window(s).
             # The App Store GUI will remain open and responsive.
-            thread = threading.Thread(target=self._run_app, args=(module_name, display_name))
-            thread.daemon = True # Allow the main thread to exit even if this is running
-            thread.start()
-
-
-    def _run_app(self, module_name, display_name):
+            job = self.engine.run(package_name, module_name, display_name, profile=profile)
+            self.log_message(f"Queued job #{job.job_id}: {'profile launch of' if profile else 'run'} {display_name} (module: {module_name})\n")
+
+
+    def _update_running_apps(self, apps):
+        """Shows the latest sample of the running apps, updating rows in place so the selection survives."""
+        rows = {str(app["app_id"]): app for app in apps}
+        for item in self.running_tree.get_children():
+            if item not in rows:
+                self.running_tree.delete(item)
+        for item, app in rows.items():
+            uptime = int(app["uptime_seconds"])
+            values = (app["display_name"], app["pid"],
+                      "-" if app["cpu_percent"] is None else f"{app['cpu_percent']:.1f}",
+                      "-" if app["rss_bytes"] is None else f"{app['rss_bytes'] / (1024 * 1024):.1f} MB",
+                      f"{uptime // 3600}:{uptime // 60 % 60:02d}:{uptime % 60:02d}")
+            if self.running_tree.exists(item):
+                self.running_tree.item(item, values=values)
+            else:
+                self.running_tree.insert("", tk.END, iid=item, values=values)
+
+    def _stop_selected_apps(self, kill):
+        """Stops (SIGTERM) or kills (SIGKILL) the apps selected in the running apps panel."""
+        selected = self.running_tree.selection()
+        if not selected:
+            self.log_message("Please select a running app first.\n")
+            return
+        for item in selected:
+            display_name = self.running_tree.set(item, "app")
+            if self.engine.process_supervisor.stop(int(item), kill=kill):
+                self.log_message(f"{'Killing' if kill else 'Stopping'} {display_name}...\n")
+
+    def _setup_queue_wakeup(self):
+        """Arranges for _process_queue to run as soon as a worker queues something.
+
+        Where Tk supports file handlers (not on Windows) workers write a byte to a pipe that
+        the Tk event loop watches. Elsewhere they post a virtual event, which tkinter hands
+        over to the main thread. Either way the main loop sleeps while nothing is running.
         """
-        Runs the specified application module using `python -m <module_name>`.
-        This launches the application in a separate process.
-        If the launched application is a GUI, it will appear in its own window(s),
-        separate from the App Store window.
-        """
-        # Use sys.executable to ensure we use the correct python interpreter
-        run_command = [sys.executable, '-m', module_name]
+        self._wakeup_pipe = None
+        self._wakeup_pipe_lock = threading.Lock() # Keeps teardown from closing the pipe during a write
+        if sys.platform != "win32" and hasattr(self.tk, "createfilehandler"):
+            read_fd, write_fd = os.pipe()
+            os.set_blocking(read_fd, False)
+            os.set_blocking(write_fd, False)
+            self._wakeup_pipe = (read_fd, write_fd)
+            self.tk.createfilehandler(read_fd, tk.READABLE, self._on_wakeup_pipe_readable)
+            self.output_queue.wakeup = self._wake_via_pipe
+        else:
+            self.bind("<<OutputQueueWakeup>>", lambda event: self._process_queue())
+            self.output_queue.wakeup = self._wake_via_event
+
+    def _wake_via_pipe(self):
+        with self._wakeup_pipe_lock:
+            if self._wakeup_pipe is None:
+                return # Torn down while shutting down
+            try:
+                os.write(self._wakeup_pipe[1], b"\0")
+            except BlockingIOError:
+                pass # The pipe is full, so the main loop is going to wake up anyway
 
+    def _wake_via_event(self):
         try:
-            self.log_message(f"Launching process: {' '.join(run_command)}\n")
-            # Use Popen and DO NOT wait for the process to finish.
-            # This allows the launched app (especially GUIs) to run independently.
-            # We don't typically capture stdout/stderr for GUI apps launched this way,
-            # as they often detach or manage their own output/errors.
-            # Setting creationflags can help detach the process from the console on Windows
-            # subprocess.CREATE_NEW_CONSOLE or subprocess.DETACHED_PROCESS
-            # Be cautious with creationflags as behavior varies by OS/environment.
-            # A simple Popen is usually sufficient for GUI apps which handle their own windowing.
-
-            process = subprocess.Popen(run_command) # No stdout/stderr pipes needed here for typical GUI launch
-            self.log_message(f"{display_name} process launched with PID: {process.pid}\n")
-            self.log_message(f"Interact with {display_name} in its own window(s).\n")
-
-            # Signal that the *launching* process within this thread is done.
-            # This allows the GUI to re-enable buttons. It does NOT mean the launched app has finished executing.
-            self.output_queue.put(("FINISH_THREAD", None, None))
-
-        except FileNotFoundError:
-            self.output_queue.put(f"[ERROR] Python interpreter or module '{module_name}' not found.\n")
-            self.output_queue.put(("FINISH_THREAD", None, None))
-        except Exception as e:
-            # Catch other potential errors during Popen, like permission issues
-            self.output_queue.put(f"[ERROR] Failed to launch application '{display_name}': {e}\n")
-            self.output_queue.put(("FINISH_THREAD", None, None))
+            self.event_generate("<<OutputQueueWakeup>>", when="tail")
+        except (tk.TclError, RuntimeError):
+            pass # Window is being destroyed
 
+    def _on_wakeup_pipe_readable(self, fd, mask):
+        try:
+            while os.read(fd, READ_CHUNK_SIZE):
+                pass # Drain every pending wakeup byte; one tick handles them all
+        except BlockingIOError:
+            pass
+        self._process_queue()
+
+    def _teardown_queue_wakeup(self):
+        self.output_queue.wakeup = None
+        with self._wakeup_pipe_lock:
+            if self._wakeup_pipe is not None:
+                self.tk.deletefilehandler(self._wakeup_pipe[0])
+                for fd in self._wakeup_pipe:
+                    os.close(fd)
+                self._wakeup_pipe = None
 
     def _process_queue(self):
-        """Checks the queue for messages and updates the GUI."""
+        """Drains the queue and updates the GUI, within a time budget per tick."""
+        # Acknowledge first: anything put from now on wakes us again, so nothing is missed
+        self.output_queue.acknowledge()
+        with self.engine.tracer.span("ui.process_queue") as span:
+            handled = self._drain_queue()
+            span.set(events=handled)
+
+        # Out of budget with work left: let Tk handle pending input first, then continue
+        if not self.output_queue.empty() and self.winfo_exists():
+             self.after(1, self._process_queue)
+
+    def _drain_queue(self):
+        """Handles queued events until the queue is empty or the tick's time budget is used up.
+
+        Returns the number of events handled.
+        """
+        handled = 0
+        deadline = time.perf_counter() + QUEUE_DRAIN_BUDGET_SECONDS
         try:
-            while True:
-                # Use a small timeout to prevent blocking the GUI thread indefinitely
-                item = self.output_queue.get_nowait()
-                if isinstance(item, tuple):
-                    if item[0] == "DONE":
-                        package_name, rc = item[1], item[2]
-                        status = "SUCCESS" if rc == 0 else "FAILED"
-                        self.log_message(f"Operation on {package_name} {status} (Return Code: {rc}).\n\n")
-                    elif item[0] == "FINISH_THREAD":
-                         # This signal comes from the thread's finally block
-                         self.enable_buttons()
-                    # Add other tuple types here if needed (e.g., progress updates)
-                elif isinstance(item, str):
-                    self.log_message(item)
+            while time.perf_counter() < deadline:
+                event = self.output_queue.get_nowait()
+                handled += 1
+                if isinstance(event, OutputChunk):
+                    # Captured subprocess output, tagged with the stream it came from
+                    self.log_message(format_output_chunk(event.stream, event.text))
+                elif isinstance(event, Progress):
+                    self.log_message(event.message)
+                elif isinstance(event, JobError):
+                    self.log_message(f"[ERROR] {event.message}")
+                elif isinstance(event, JobStarted):
+                    self.log_message(f"Job #{event.job_id} started: {event.kind} {event.package_name}")
+                elif isinstance(event, JobFinished):
+                    status = "SUCCESS" if event.returncode == 0 else "FAILED"
+                    self.log_message(f"Job #{event.job_id}: {event.kind} {event.package_name} {status} (Return Code: {event.returncode}).\n\n")
+                    # A finished job may have changed what is installed
+                    self._refresh_installed_state()
+                    self.enable_buttons()
+                elif isinstance(event, AppExited):
+                    self.log_message(f"{event.display_name} (PID {event.pid}) exited with return code {event.returncode}.\n")
+                elif isinstance(event, AppsSampled):
+                    self._update_running_apps(event.apps)
+                elif isinstance(event, LaunchProfiled):
+                    self.log_message(f"Launch profile of {event.display_name}:\n{format_launch_profile(event.profile, event.previous)}\n")
+                elif isinstance(event, EngineLoaded):
+                    self._on_engine_loaded(event)
         except queue.Empty:
             pass # No items in the queue
-
-        # Schedule the next check using self.after
-        # Only reschedule if the window still exists
-        if self.winfo_exists():
-             self.after(100, self._process_queue)
+        # Render everything drained in this tick with a single insert
+        self._flush_output()
+        return handled
 
     def on_closing(self):
         """Handle closing the window."""
-        if messagebox.askokcancel("Quit", "Do you want to quit?"):
-            # Signal runner threads to stop if they were written to check the event
-            self.command_runner._stop_event.set()
+        running_apps = self.engine.process_supervisor.apps()
+        prompt = "Do you want to quit?"
+        if running_apps:
+            prompt += f"\nThe {len(running_apps)} running app(s) will be stopped."
+        if messagebox.askokcancel("Quit", prompt):
+            # Signal runner threads to stop, drop jobs that have not started yet,
+            # and stop the launched apps (killing those that do not exit in time)
+            self.engine.shutdown(stop_apps=True)
+            self._teardown_queue_wakeup()
+            self._flush_output()
+            self.output_log.close()
             # If there's a lingering subprocess launched by command_runner (e.g. pip download),
             # you might want to terminate it here, but be cautious.
-            # if self.command_runner._current_process and self.command_runner._current_process.poll() is None:
+            # for process in list(self.engine.command_runner._processes):
             #     try:
-            #         self.command_runner._current_process.terminate()
+            #         process.terminate()
             #     except OSError: # Process might have already exited
             #          pass
             self.destroy()
@@ -416,7 +693,8 @@ class GeminiAppStore(tk.Tk):
 
 # --- Main Execution ---
 
-if __name__ == "__main__":
+def print_startup_notes():
+    """Prints notes about the setup to the console."""
     # Add a note if running directly without packaging
     print(f"Note: This app store is designed to be installed from PyPi (package '{APP_STORE_PACKAGE_NAME}').")
     print(f"When you click 'Install', it will attempt to install '{APP_STORE_PACKAGE_NAME}' from PyPi first.")
@@ -433,7 +711,15 @@ if __name__ == "__main__":
         #     sys.exit(1)
 
 
+def main():
+    """Starts the GUI. This is what the `main` console script runs."""
     app = GeminiAppStore()
     # Handle window closing event
     app.protocol("WM_DELETE_WINDOW", app.on_closing)
-    app.mainloop()
\ No newline at end of file
+    # The notes are printed once the main loop runs, so they never hold up the window
+    app.after_idle(print_startup_notes)
+    app.mainloop()
+
+
+if __name__ == "__main__":
+    main()
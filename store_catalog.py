@@ -0,0 +1,176 @@
+"""
+This file contains the app catalog of the application "Gemini AI App Store":
+the built-in apps plus the entries of an optional, versioned JSON catalog file,
+with a token prefix index for fast searching.
+Author: SoftwareApkDev
+"""
+
+import bisect
+import json
+import os
+import re
+import threading
+
+# Highest catalog file format this version of the store understands.
+CATALOG_FORMAT_VERSION = 1
+# Entry fields that must be strings if set; they are searched and passed to pip and the launcher.
+TEXT_FIELDS = ("display_name", "package_name", "module_name", "description")
+
+
+class CatalogError(ValueError):
+    """Raised when a catalog file cannot be parsed or uses an unsupported format."""
+
+
+def tokenize(text):
+    """Splits text into lowercase alphanumeric tokens, e.g. 'Gemini Agar.io' -> ['gemini', 'agar', 'io']."""
+    return re.findall(r"[a-z0-9]+", text.lower())
+
+
+class AppCatalog:
+    """The apps offered by the store.
+
+    Built-in apps come first, followed by the apps of `catalog_file` if it exists. A file
+    entry with the same display name as a built-in app replaces it. The file looks like:
+
+        {"format_version": 1,
+         "apps": [{"display_name": "Gemini Pong", "package_name": "gemini_pong",
+                   "module_name": "gemini_pong", "description": "..."}]}
+
+    The file is parsed once and only reparsed by reload_if_changed() when its mtime or size
+    changes. The search index is built on first use (or ahead of time by warm_up()), so
+    loading stays cheap. It is a sorted token list, so a prefix lookup is a binary search.
+    """
+    def __init__(self, builtin_apps, catalog_file=None):
+        self.builtin_apps = builtin_apps
+        self.catalog_file = catalog_file
+        self._file_signature = None # (st_mtime_ns, st_size) of the catalog file when it was parsed
+        self._apps = {} # display name -> app info, in catalog order
+        self._names = [] # display names, in catalog order
+        self._index_lock = threading.Lock()
+        self._index = None # (names, sorted unique tokens, for each token the indices into names containing it)
+        self._build(self._load_file_apps())
+
+    @classmethod
+    def builtin_only(cls, builtin_apps, catalog_file):
+        """Returns a catalog of only the built-in apps that still watches a broken `catalog_file`.
+
+        Its current version is not parsed again, but reload_if_changed() parses it once it changes.
+        """
+        catalog = cls(builtin_apps)
+        catalog.catalog_file = catalog_file
+        catalog._file_signature = catalog._current_file_signature()
+        return catalog
+
+    def warm_up(self):
+        """Builds the search index in a background thread, so the first search is fast too."""
+        threading.Thread(target=self._get_index, name="CatalogIndex", daemon=True).start()
+
+    def reload_if_changed(self):
+        """Reparses the catalog file if it changed since it was parsed. Returns True if it did."""
+        if self._current_file_signature() == self._file_signature:
+            return False
+        self._build(self._load_file_apps())
+        return True
+
+    def names(self):
+        """Returns every display name, in catalog order."""
+        return list(self._names)
+
+    def get(self, display_name, default=None):
+        """Returns the app info dict for `display_name`."""
+        return self._apps.get(display_name, default)
+
+    def items(self):
+        return self._apps.items()
+
+    def __contains__(self, display_name):
+        return display_name in self._apps
+
+    def __len__(self):
+        return len(self._names)
+
+    def search(self, query):
+        """Returns the display names (in catalog order) of apps matching every word of `query`.
+
+        A word matches an app if it is a prefix of a word in its display name, package name,
+        module name or description. An empty query matches every app.
+        """
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return self.names()
+        names, tokens, postings = self._get_index()
+        matches = None
+        for query_token in query_tokens:
+            # All tokens starting with query_token sit next to each other in the sorted list
+            start = bisect.bisect_left(tokens, query_token)
+            end = bisect.bisect_left(tokens, query_token + "\uffff", start)
+            token_matches = set()
+            for token_postings in postings[start:end]:
+                token_matches.update(token_postings)
+            matches = token_matches if matches is None else matches & token_matches
+            if not matches:
+                return []
+        return [names[index] for index in sorted(matches)]
+
+    def _current_file_signature(self):
+        if not self.catalog_file:
+            return None
+        try:
+            st = os.stat(self.catalog_file)
+        except OSError:
+            return None # No catalog file (any more): only the built-in apps are offered
+        return (st.st_mtime_ns, st.st_size)
+
+    def _load_file_apps(self):
+        """Parses the catalog file. Returns its apps as a dict, empty if there is no file."""
+        self._file_signature = self._current_file_signature()
+        if self._file_signature is None:
+            return {}
+        try:
+            with open(self.catalog_file, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CatalogError(f"Could not read catalog {self.catalog_file}: {e}") from e
+        if not isinstance(data, dict) or not isinstance(data.get("apps"), list):
+            raise CatalogError(f"Catalog {self.catalog_file} has no 'apps' list.")
+        format_version = data.get("format_version", 1)
+        if not isinstance(format_version, int) or isinstance(format_version, bool):
+            raise CatalogError(f"Catalog {self.catalog_file} has format version {format_version!r}, which is not a number.")
+        if format_version > CATALOG_FORMAT_VERSION:
+            raise CatalogError(f"Catalog {self.catalog_file} uses format version {format_version}, "
+                               f"but only versions up to {CATALOG_FORMAT_VERSION} are supported. Please upgrade the store.")
+        apps = {}
+        for entry in data["apps"]:
+            if not isinstance(entry, dict) or not entry.get("display_name") or not entry.get("package_name"):
+                continue # Skip malformed entries rather than rejecting the whole catalog
+            if not all(entry.get(key) is None or isinstance(entry[key], str) for key in TEXT_FIELDS):
+                continue
+            app_info = {key: value for key, value in entry.items() if key != "display_name"}
+            apps[entry["display_name"]] = app_info
+        return apps
+
+    def _build(self, file_apps):
+        apps = dict(self.builtin_apps)
+        apps.update(file_apps)
+        with self._index_lock:
+            self._apps = apps
+            self._names = list(apps)
+            self._index = None # Rebuilt on next use
+
+    def _get_index(self):
+        """Returns (names, tokens, postings), building the index if needed."""
+        with self._index_lock:
+            if self._index is None:
+                postings_by_token = {}
+                for index, (display_name, app_info) in enumerate(self._apps.items()):
+                    text = " ".join([display_name, app_info.get("package_name") or "",
+                                     app_info.get("module_name") or "", app_info.get("description") or ""])
+                    for token in set(tokenize(text)):
+                        token_postings = postings_by_token.get(token)
+                        if token_postings is None:
+                            postings_by_token[token] = [index]
+                        else:
+                            token_postings.append(index)
+                tokens = sorted(postings_by_token)
+                self._index = (self._names, tokens, [postings_by_token[token] for token in tokens])
+            return self._index
@@ -0,0 +1,270 @@
+"""
+This file contains the command line interface of the application "Gemini AI App Store",
+for provisioning machines from scripts or CI without a display.
+It only uses store_engine.py and never imports tkinter.
+Author: SoftwareApkDev
+"""
+
+import argparse
+import contextlib
+import json
+import queue
+import sys
+import time
+
+from store_engine import (
+    APP_STORE_PACKAGE_NAME, MAX_PARALLEL_JOBS, OFFLINE_MODE, ISOLATED_APPS, TRACE_FILE, METRICS_FILE,
+    StoreEngine, OutputChunk, Progress, JobError, JobStarted, JobFinished, AppExited, LaunchProfiled,
+    format_output_chunk, normalize_package_name,
+)
+from store_launch import format_launch_profile
+
+# How long `run --profile` still waits for the launch profile once the app exited
+APP_EXIT_PROFILE_GRACE_SECONDS = 2
+
+
+def find_apps(catalog, names):
+    """Maps display names or package names given on the command line to catalog entries.
+
+    Returns a list of (display_name, app_info). Raises ValueError for unknown names.
+    """
+    by_package = {normalize_package_name(info["package_name"]): display_name for display_name, info in catalog.items()}
+    by_display = {display_name.lower(): display_name for display_name in catalog.names()}
+    apps = []
+    for name in names:
+        display_name = by_display.get(name.lower()) or by_package.get(normalize_package_name(name))
+        if display_name is None:
+            raise ValueError(f"Unknown app: {name}. Use 'list' to see the available apps.")
+        apps.append((display_name, catalog.get(display_name)))
+    return apps
+
+
+def print_events(engine, events, verbose):
+    """Prints events from the `events` channel until every job has finished.
+
+    Returns (ids of the jobs whose LaunchProfiled event was printed, ids of the jobs whose app exited).
+    """
+    profiled_jobs = set()
+    exited_jobs = set()
+    while True:
+        try:
+            event = events.get(timeout=0.2)
+        except queue.Empty:
+            if engine.wait_all(timeout=0) and events.empty():
+                return profiled_jobs, exited_jobs
+            continue
+        if isinstance(event, OutputChunk):
+            if verbose:
+                stream = sys.stderr if event.stream == "stderr" else sys.stdout
+                stream.write(format_output_chunk(event.stream, event.text))
+        elif isinstance(event, Progress):
+            print(f"[#{event.job_id}] {event.message}" if event.job_id else event.message)
+        elif isinstance(event, JobError):
+            print(f"[#{event.job_id}] [ERROR] {event.message}", file=sys.stderr)
+        elif isinstance(event, JobStarted):
+            print(f"[#{event.job_id}] Started: {event.kind} {event.package_name}")
+        elif isinstance(event, JobFinished):
+            status = "SUCCESS" if event.returncode == 0 else "FAILED"
+            print(f"[#{event.job_id}] {event.kind} {event.package_name} {status} (Return Code: {event.returncode})")
+        elif isinstance(event, LaunchProfiled):
+            print(format_launch_profile(event.profile, event.previous))
+            profiled_jobs.add(event.job_id)
+        elif isinstance(event, AppExited):
+            exited_jobs.add(event.job_id)
+
+
+@contextlib.contextmanager
+def open_engine(args, max_workers=None):
+    """Yields a StoreEngine for the command, shutting it down afterwards so the trace and metrics files are written."""
+    engine = StoreEngine(max_workers=max_workers or args.jobs, offline=args.offline, isolated=args.isolated,
+                         trace_file=args.trace, metrics_file=args.metrics)
+    if engine.catalog_error:
+        print(f"[ERROR] {engine.catalog_error}", file=sys.stderr)
+    try:
+        yield engine
+    finally:
+        engine.shutdown()
+
+
+def follow_apps(engine, events, job_ids, profiled_jobs, exited_jobs):
+    """Passes on the stderr of the apps of the run jobs `job_ids` until they exit, printing their launch profiles.
+
+    A profiled app's stderr is a pipe the engine reads, so the command must not exit before the app
+    does: nobody would read it any more. Ctrl+C stops the apps.
+    """
+    profiles_pending = set(job_ids) - profiled_jobs
+    running = set(job_ids) - exited_jobs
+    if running:
+        print("Passing on the app's output until it exits. Press Ctrl+C to stop it.", file=sys.stderr)
+    deadline = None if running else time.monotonic() + APP_EXIT_PROFILE_GRACE_SECONDS
+    try:
+        while running or profiles_pending:
+            try:
+                event = events.get(timeout=None if deadline is None else max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if event.job_id not in job_ids:
+                continue
+            if isinstance(event, LaunchProfiled):
+                print(format_launch_profile(event.profile, event.previous))
+                profiles_pending.discard(event.job_id)
+            elif isinstance(event, AppExited):
+                running.discard(event.job_id)
+                if not running:
+                    # The profile is recorded once the app's stderr is closed, which happens as it exits
+                    deadline = time.monotonic() + APP_EXIT_PROFILE_GRACE_SECONDS
+            elif isinstance(event, OutputChunk):
+                sys.stderr.write(event.text) # The app's own stderr
+    except KeyboardInterrupt:
+        engine.process_supervisor.stop_all()
+        return
+    if profiles_pending:
+        print("[ERROR] No launch profile was recorded.", file=sys.stderr)
+
+
+def run_jobs(args, submit, follow_profiled_apps=False):
+    """Runs `submit(engine)` and reports progress. Returns 0 if every job it queued succeeded.
+
+    With `follow_profiled_apps`, it then passes on the output of the launched apps until they exit.
+    """
+    # Also shut down when submit() rejects the arguments
+    with open_engine(args) as engine:
+        events = engine.event_bus.subscribe()
+        jobs = submit(engine)
+        profiled_jobs, exited_jobs = print_events(engine, events, args.verbose)
+        if follow_profiled_apps and all(job.returncode == 0 for job in jobs):
+            follow_apps(engine, events, {job.job_id for job in jobs}, profiled_jobs, exited_jobs)
+    return 0 if all(job.returncode == 0 for job in jobs) else 1
+
+
+def command_list(args):
+    with open_engine(args, max_workers=1) as engine:
+        apps = engine.list_apps(" ".join(args.query))
+    if args.json:
+        print(json.dumps(apps, indent=2))
+    else:
+        for app in apps:
+            status = f"installed {app['installed_version']}" if app["installed_version"] else "not installed"
+            print(f"{app['display_name']:<25} {app['package_name']:<25} {status}")
+    return 0
+
+
+def command_status(args):
+    with open_engine(args, max_workers=1) as engine:
+        apps = engine.list_apps()
+        status = {
+            "store_version": engine.store_upgrader.installed_version(),
+            "store_upgrade_fresh": engine.store_upgrader.is_fresh(),
+            "offline": args.offline,
+            "isolated": args.isolated,
+            "app_envs_dir": engine.app_envs.envs_dir,
+            "installed_apps": sum(1 for app in apps if app["installed_version"]),
+            "available_apps": len(apps),
+            "catalog_file": engine.catalog.catalog_file,
+            "wheel_cache_dir": engine.wheel_cache.cache_dir,
+        }
+    if args.json:
+        print(json.dumps(status, indent=2))
+    else:
+        print(f"{APP_STORE_PACKAGE_NAME} version: {status['store_version'] or 'not installed'}"
+              f" ({'up to date' if status['store_upgrade_fresh'] else 'upgrade check due'})")
+        print(f"Installed apps: {status['installed_apps']} of {status['available_apps']}")
+        print(f"Catalog file: {status['catalog_file']}")
+        print(f"Wheel cache: {status['wheel_cache_dir']}")
+        print(f"Offline mode: {'on' if args.offline else 'off'}")
+        print(f"Isolated app environments: {'on (' + status['app_envs_dir'] + ')' if args.isolated else 'off'}")
+    return 0
+
+
+def command_install(args):
+    def submit(engine):
+        apps = list(engine.catalog.items()) if args.all else find_apps(engine.catalog, args.apps)
+        package_names = [app_info["package_name"] for _, app_info in apps]
+        if args.batch:
+            return [engine.install(package_names)]
+        return [engine.install([package_name]) for package_name in package_names]
+    return run_jobs(args, submit)
+
+
+def command_uninstall(args):
+    return run_jobs(args, lambda engine: [engine.uninstall(app_info["package_name"]) for _, app_info in find_apps(engine.catalog, args.apps)])
+
+
+def command_run(args):
+    def submit(engine):
+        display_name, app_info = find_apps(engine.catalog, [args.app])[0]
+        if not app_info.get("module_name"):
+            raise ValueError(f"Cannot run {display_name}. No runnable module name ('module_name') specified.")
+        return [engine.run(app_info["package_name"], app_info["module_name"], display_name, profile=args.profile)]
+    return run_jobs(args, submit, follow_profiled_apps=args.profile)
+
+
+def command_launches(args):
+    with open_engine(args, max_workers=1) as engine:
+        package_name = find_apps(engine.catalog, [args.app])[0][1]["package_name"] if args.app else None
+        entries = engine.launch_history.entries(package_name)[-args.limit:]
+    if args.json:
+        print(json.dumps(entries, indent=2))
+    else:
+        for entry in entries:
+            print(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(entry["time"])), format_launch_profile(entry))
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="gemini-app-store", description="Install, run and manage Gemini AI apps without the GUI.")
+    parser.add_argument("-j", "--jobs", type=int, default=MAX_PARALLEL_JOBS, help=f"number of jobs to run in parallel (default: {MAX_PARALLEL_JOBS})")
+    parser.add_argument("--offline", action="store_true", default=OFFLINE_MODE, help="never touch the network; install from the wheel cache only")
+    parser.add_argument("--isolated", action="store_true", default=ISOLATED_APPS, help="install and run every app in its own environment")
+    parser.add_argument("--trace", metavar="FILE", default=TRACE_FILE, help="append timed spans of every operation to FILE (JSON lines)")
+    parser.add_argument("--metrics", metavar="FILE", default=METRICS_FILE, help="write metrics to FILE in the Prometheus text format")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show pip's output")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = subparsers.add_parser("list", help="list the available apps and whether they are installed")
+    list_parser.add_argument("query", nargs="*", help="only list apps matching all of these words (prefixes)")
+    list_parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    list_parser.set_defaults(func=command_list)
+
+    status_parser = subparsers.add_parser("status", help="show the state of the store itself")
+    status_parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    status_parser.set_defaults(func=command_status)
+
+    install_parser = subparsers.add_parser("install", help="install apps")
+    install_parser.add_argument("apps", nargs="*", help="display names or package names of the apps")
+    install_parser.add_argument("--all", action="store_true", help="install every available app")
+    install_parser.add_argument("--batch", action="store_true", help="install all apps with a single pip invocation")
+    install_parser.set_defaults(func=command_install)
+
+    uninstall_parser = subparsers.add_parser("uninstall", help="uninstall apps")
+    uninstall_parser.add_argument("apps", nargs="+", help="display names or package names of the apps")
+    uninstall_parser.set_defaults(func=command_uninstall)
+
+    run_parser = subparsers.add_parser("run", help="launch an installed app")
+    run_parser.add_argument("app", help="display name or package name of the app")
+    run_parser.add_argument("--profile", action="store_true", help="profile the launch (time to first window, slowest imports) and record it")
+    run_parser.set_defaults(func=command_run)
+
+    launches_parser = subparsers.add_parser("launches", help="show recorded launch profiles")
+    launches_parser.add_argument("app", nargs="?", help="only show the profiles of this app")
+    launches_parser.add_argument("-n", "--limit", type=int, default=20, help="number of profiles to show (default: 20)")
+    launches_parser.add_argument("--json", action="store_true", help="print machine-readable JSON")
+    launches_parser.set_defaults(func=command_launches)
+    return parser
+
+
+def main(argv=None):
+    """Entry point of the `gemini-app-store` console script."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "install" and not args.all and not args.apps:
+        parser.error("install: give app names or --all")
+    try:
+        return args.func(args)
+    except ValueError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
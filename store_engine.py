@@ -0,0 +1,1486 @@
+"""
+This file contains the GUI-free engine of the application "Gemini AI App Store":
+installing, uninstalling, running and listing apps. Neither it nor the store_* modules it
+imports may import tkinter, so that the command line (store_cli.py) starts fast and works
+without a display.
+Author: SoftwareApkDev
+"""
+
+import subprocess
+import sys
+import threading
+import queue
+import codecs
+import locale
+import os
+import collections
+import itertools
+import re
+import json
+import time
+import signal
+
+try:
+    import resource # Unix only; used to apply resource limits to launched apps
+except ImportError:
+    resource = None
+
+# Modules that are slow to import and not needed to show the store's window (importlib.metadata,
+# hashlib, logging.handlers, shutil, tempfile, venv, webbrowser, ...) are imported where they are used,
+# here and in main.py and the other store_* modules. benchmarks/check_startup.py fails if one is not.
+
+from store_catalog import AppCatalog, CatalogError
+from store_envs import AppEnvironments
+from store_files import READ_CHUNK_SIZE, hash_file
+from store_launch import LaunchHistory, LaunchProfile, probe_command
+from store_telemetry import MetricsExporter, MetricsRegistry, Tracer
+
+# --- Configuration ---
+
+# Replace with your actual PyPi package name!
+# When you package this app store itself, this name should match your setup.py/pyproject.toml
+APP_STORE_PACKAGE_NAME = "gemini_ai_app_store"
+
+# Define the apps built into the store. More apps can be listed in the catalog file (CATALOG_FILE below)
+# without touching this source code.
+# Format: {"Display Name": {"package_name": "pypi-package-name", "module_name": "module_to_run_with_python_m"}}
+# module_name is optional if the app is just a library, but required to "Run" it.
+
+AVAILABLE_APPS = {
+    # Example: A hypothetical Gemini Chat app distributed as 'gemini_chat_app' on PyPi
+    # and runnable with 'python -m gemini_chat_app'
+    "Gemini Chat App": {"package_name": "gemini_chat_app", "module_name": "gemini_chat_app"},
+    "Gemini Geometry Wars": {"package_name": "gemini_geometry_wars", "module_name": "gemini_geometry_wars"},
+    "Gemini Breakout": {"package_name": "gemini_breakout", "module_name": "gemini_breakout"},
+    "Gemini Agar.io": {"package_name": "gemini_agario", "module_name": "gemini_agario"},
+    "Gemini Outrun": {"package_name": "gemini_outrun", "module_name": "gemini_outrun"},
+    "Gemini Pong": {"package_name": "gemini_pong", "module_name": "gemini_pong"},
+    # Add more Gemini-integrated apps here.
+    # REMEMBER: These package_names must exist on PyPi, and module_names must be runnable.
+}
+
+# Where the store keeps its own state (caches, logs, ...)
+STORE_DATA_DIR = os.path.join(os.path.expanduser("~"), ".gemini_ai_app_store")
+
+# Catalog file with more apps: a local file, or a mirror of a shared index kept up to date by other means.
+# It is parsed once and only reparsed when its modification time changes. See store_catalog.py for the format.
+CATALOG_FILE = os.environ.get("GEMINI_APP_STORE_CATALOG", os.path.join(STORE_DATA_DIR, "catalog.json"))
+
+# The store upgrades itself before installing apps, but at most once per this many seconds.
+# The time of the last successful upgrade and the version it left installed are cached on disk.
+STORE_UPGRADE_TTL_SECONDS = 24 * 60 * 60
+STORE_UPGRADE_CACHE_FILE = os.path.join(STORE_DATA_DIR, "store_upgrade.json")
+
+# Wheels of installed apps (and their dependencies) are kept here so reinstalls don't hit the network.
+# Least recently used wheels are evicted once the cache grows beyond WHEEL_CACHE_MAX_BYTES.
+WHEEL_CACHE_DIR = os.path.join(STORE_DATA_DIR, "wheels")
+WHEEL_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+# In offline mode the store never touches the network: apps are installed only from the wheel cache
+# (which can be pre-seeded for air-gapped machines) and the store does not upgrade itself.
+OFFLINE_MODE = os.environ.get("GEMINI_APP_STORE_OFFLINE", "") not in ("", "0")
+
+# In isolated mode every app is installed into its own virtual environment under APP_ENVS_DIR
+# instead of the store's interpreter, so apps cannot break each other's dependencies.
+# Files that are identical across environments are stored once and hard-linked.
+ISOLATED_APPS = os.environ.get("GEMINI_APP_STORE_ISOLATED", "") not in ("", "0")
+APP_ENVS_DIR = os.path.join(STORE_DATA_DIR, "envs")
+
+# Profiles of app launches (time to first window, slowest imports), one JSON object per line.
+LAUNCH_HISTORY_FILE = os.path.join(STORE_DATA_DIR, "launch_history.jsonl")
+
+# Instrumentation, off unless configured. Timed spans of every operation are appended to TRACE_FILE
+# (JSON lines). Counters and latency histograms are written to METRICS_FILE and/or served on
+# http://127.0.0.1:METRICS_PORT/metrics, in the Prometheus text format.
+TRACE_FILE = os.environ.get("GEMINI_APP_STORE_TRACE_FILE", "")
+METRICS_FILE = os.environ.get("GEMINI_APP_STORE_METRICS_FILE", "")
+METRICS_PORT = int(os.environ.get("GEMINI_APP_STORE_METRICS_PORT", "0"))
+
+# Number of install/uninstall/run jobs that may run at the same time.
+# Jobs touching the same package are always serialized, whatever this is set to.
+MAX_PARALLEL_JOBS = 4
+
+# Launched apps are reaped, and their CPU and memory use sampled from /proc, once per this many seconds.
+APP_SAMPLE_INTERVAL_SECONDS = 2.0
+# How long a launched app is given to exit after being asked to stop, before it is killed.
+APP_STOP_TIMEOUT_SECONDS = 5.0
+# Optional limits for launched apps, e.g. on shared machines. 0 means no limit.
+APP_NICENESS = int(os.environ.get("GEMINI_APP_STORE_APP_NICENESS", "0"))
+APP_MAX_MEMORY_MB = int(os.environ.get("GEMINI_APP_STORE_APP_MAX_MEMORY_MB", "0"))
+APP_MAX_CPU_SECONDS = int(os.environ.get("GEMINI_APP_STORE_APP_MAX_CPU_SECONDS", "0"))
+
+# --- Events ---
+
+class Event:
+    """Base class of everything published on the EventBus.
+
+    `job_id` is the ID of the job the event belongs to, or None for store-wide events.
+    """
+    __slots__ = ("job_id",)
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for cls in type(self).__mro__ for name in getattr(cls, "__slots__", ()))
+        return f"{type(self).__name__}({fields})"
+
+
+class OutputChunk(Event):
+    """A chunk of complete lines captured from a command's stdout or stderr."""
+    __slots__ = ("stream", "text")
+
+    def __init__(self, job_id, stream, text):
+        super().__init__(job_id)
+        self.stream = stream # "stdout" or "stderr"
+        self.text = text
+
+
+class Progress(Event):
+    """A human-readable status message about a job."""
+    __slots__ = ("message",)
+
+    def __init__(self, job_id, message):
+        super().__init__(job_id)
+        self.message = message
+
+
+class JobError(Event):
+    """Something went wrong in a job. The job may still go on (e.g. with a fallback)."""
+    __slots__ = ("message",)
+
+    def __init__(self, job_id, message):
+        super().__init__(job_id)
+        self.message = message
+
+
+class JobStarted(Event):
+    __slots__ = ("kind", "package_name")
+
+    def __init__(self, job_id, kind, package_name):
+        super().__init__(job_id)
+        self.kind = kind
+        self.package_name = package_name
+
+
+class JobFinished(Event):
+    """Always the last event of a job."""
+    __slots__ = ("kind", "package_name", "returncode")
+
+    def __init__(self, job_id, kind, package_name, returncode):
+        super().__init__(job_id)
+        self.kind = kind
+        self.package_name = package_name
+        self.returncode = returncode
+
+
+class AppExited(Event):
+    """An app launched by a run job exited, by itself or because it was stopped."""
+    __slots__ = ("app_id", "display_name", "pid", "returncode")
+
+    def __init__(self, job_id, app_id, display_name, pid, returncode):
+        super().__init__(job_id)
+        self.app_id = app_id
+        self.display_name = display_name
+        self.pid = pid
+        self.returncode = returncode
+
+
+class AppsSampled(Event):
+    """The latest resource sample of every running app, as a list of SupervisedApp.snapshot() dicts."""
+    __slots__ = ("apps",)
+
+    def __init__(self, job_id, apps):
+        super().__init__(job_id)
+        self.apps = apps
+
+
+class LaunchProfiled(Event):
+    """The profile of an app launched with profiling, once its first window is shown (or it exited).
+
+    `profile` is a LaunchProfile.to_dict(); `previous` is the last profile of another version, or None.
+    """
+    __slots__ = ("display_name", "profile", "previous")
+
+    def __init__(self, job_id, display_name, profile, previous):
+        super().__init__(job_id)
+        self.display_name = display_name
+        self.profile = profile
+        self.previous = previous
+
+
+class EngineLoaded(Event):
+    """StoreEngine.load(background=True) finished: the catalog and the installed packages are known."""
+    __slots__ = ("seconds", "catalog_error")
+
+    def __init__(self, job_id, seconds, catalog_error):
+        super().__init__(job_id)
+        self.seconds = seconds
+        self.catalog_error = catalog_error # Why the catalog file could not be used, or None
+
+
+class EventBus:
+    """Delivers events to subscribed channels (anything with a put() method, e.g. a queue.Queue).
+
+    A channel either subscribes to every event, or to the events of a single job. Job channels
+    are dropped automatically after that job's JobFinished event. Every subscriber receives
+    the same event object, so fanning out costs no copies, and waiting on one job's channel
+    never consumes events meant for anyone else.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = [] # Channels that receive every event
+        self._job_channels = {} # job ID -> channels that receive only that job's events
+
+    def subscribe(self, channel=None, job_id=None):
+        """Subscribes `channel` (a new queue.Queue by default) and returns it."""
+        if channel is None:
+            channel = queue.Queue()
+        with self._lock:
+            if job_id is None:
+                self._channels.append(channel)
+            else:
+                self._job_channels.setdefault(job_id, []).append(channel)
+        return channel
+
+    def unsubscribe(self, channel, job_id=None):
+        with self._lock:
+            channels = self._channels if job_id is None else self._job_channels.get(job_id, [])
+            if channel in channels:
+                channels.remove(channel)
+
+    def publish(self, event):
+        with self._lock:
+            if isinstance(event, JobFinished):
+                job_channels = self._job_channels.pop(event.job_id, ())
+            else:
+                job_channels = self._job_channels.get(event.job_id, ())
+            channels = self._channels + list(job_channels)
+        # Deliver outside the lock: a channel's put() may call back into the UI
+        for channel in channels:
+            channel.put(event)
+
+
+# --- Helper Functions ---
+
+class CommandRunner:
+    """Runs commands in subprocesses on the calling worker thread, publishing their output as OutputChunk events."""
+    def __init__(self, event_bus, tracer=None):
+        self.event_bus = event_bus
+        self.tracer = Tracer() if tracer is None else tracer # Disabled unless given
+        self._output_bytes = None
+        if self.tracer.metrics is not None:
+            self._output_bytes = self.tracer.metrics.counter("command_output_bytes_total", "Bytes of output captured from commands.")
+        self._processes = set() # Processes currently running, one per concurrent command
+
+    def run_command(self, command, job_id, on_output=None):
+        """Runs a command in a subprocess for job `job_id`, publishes its output and returns the return code.
+
+        If given, `on_output(stream_name, text)` is also called with every captured chunk.
+        """
+        self.event_bus.publish(Progress(job_id, f"--> Running command: {' '.join(command)}"))
+        with self.tracer.span(command_span_name(command), job_id, command=" ".join(command)) as span:
+            output_bytes = {"stdout": 0, "stderr": 0} # Counted by the reader threads
+            rc = self._run_command(command, job_id, on_output, output_bytes)
+            span.set(returncode=rc, stdout_bytes=output_bytes["stdout"], stderr_bytes=output_bytes["stderr"])
+        if self._output_bytes is not None:
+            for stream_name, count in output_bytes.items():
+                self._output_bytes.inc(count, stream=stream_name)
+        return rc
+
+    def _run_command(self, command, job_id, on_output, output_bytes):
+        process = None
+        rc = 1
+        try:
+            # Use shell=True on Windows for .bat, .cmd files, but generally avoid it.
+            # Here we are running python -m, which doesn't need shell=True.
+            # Pipes are read as raw bytes and decoded incrementally by the readers below.
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+            self._processes.add(process) # Store the process
+
+            # Read stdout and stderr concurrently, one reader thread per pipe.
+            # Each reader blocks in os.read() on its own pipe, so neither pipe can fill up
+            # and stall the child while we wait on the other one, and nothing busy-waits.
+            readers = [
+                threading.Thread(target=self._pump_stream, args=(process.stdout, "stdout", job_id, on_output, output_bytes), daemon=True),
+                threading.Thread(target=self._pump_stream, args=(process.stderr, "stderr", job_id, on_output, output_bytes), daemon=True),
+            ]
+            for reader in readers:
+                reader.start()
+            for reader in readers:
+                reader.join()
+
+            rc = process.wait() # Both pipes hit EOF, so this only reaps the exit status
+            self.event_bus.publish(Progress(job_id, f"<-- Command finished with return code: {rc}"))
+
+        except FileNotFoundError:
+            self.event_bus.publish(JobError(job_id, "Command not found. Make sure Python and pip are in your PATH."))
+        except Exception as e:
+            self.event_bus.publish(JobError(job_id, f"An unexpected error occurred: {e}"))
+        finally:
+            self._processes.discard(process) # Clear the stored process
+        return rc
+
+    def _pump_stream(self, stream, stream_name, job_id, on_output=None, output_bytes=None):
+        """Reads a pipe in large chunks and publishes them as OutputChunk events.
+
+        The number of bytes read is added to `output_bytes[stream_name]` if given.
+        """
+        decoder = codecs.getincrementaldecoder(locale.getpreferredencoding(False))(errors="replace")
+        pending = ""
+        fd = stream.fileno()
+        try:
+            while True:
+                data = os.read(fd, READ_CHUNK_SIZE)
+                if not data:
+                    break # EOF: the child closed its end of the pipe
+                if output_bytes is not None:
+                    output_bytes[stream_name] += len(data)
+                pending += decoder.decode(data)
+                # Only hand over complete lines so log lines are never split across chunks
+                cut = pending.rfind("\n") + 1
+                if cut:
+                    self._emit_output(job_id, stream_name, pending[:cut], on_output)
+                    pending = pending[cut:]
+            pending += decoder.decode(b"", final=True)
+            if pending:
+                self._emit_output(job_id, stream_name, pending, on_output)
+        finally:
+            stream.close()
+
+    def _emit_output(self, job_id, stream_name, text, on_output):
+        self.event_bus.publish(OutputChunk(job_id, stream_name, text))
+        if on_output is not None:
+            on_output(stream_name, text)
+
+
+class StdoutCollector:
+    """An `on_output` callback for CommandRunner.run_command() that keeps the stdout chunks.
+
+    Every chunk is also passed on to `on_output(stream_name, text)` if given.
+    """
+    def __init__(self, on_output=None):
+        self.on_output = on_output
+        self._chunks = []
+
+    def __call__(self, stream_name, text):
+        if stream_name == "stdout":
+            self._chunks.append(text)
+        if self.on_output is not None:
+            self.on_output(stream_name, text)
+
+    def text(self):
+        """Returns the stdout collected so far."""
+        return "".join(self._chunks)
+
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled" # Dropped from the queue by JobScheduler.shutdown()
+
+
+class Job:
+    """A single install/uninstall/run operation tracked by the JobScheduler."""
+    def __init__(self, job_id, kind, package_name, target, args):
+        self.job_id = job_id
+        self.kind = kind # "install", "uninstall" or "run"
+        # A job may act on several packages at once (e.g. a batched install)
+        self.packages = (package_name,) if isinstance(package_name, str) else tuple(package_name)
+        self.package_name = " ".join(self.packages)
+        self.target = target
+        self.args = args
+        self.status = JOB_QUEUED
+        self.submitted_at = time.monotonic()
+        self.returncode = None
+        self._done = threading.Event()
+
+    def wait(self, timeout=None):
+        """Blocks until the job has finished. Returns True if it did within the timeout."""
+        return self._done.wait(timeout)
+
+    def __repr__(self):
+        return f"<Job #{self.job_id} {self.kind} {self.package_name} {self.status}>"
+
+
+class JobScheduler:
+    """Runs queued jobs on a bounded pool of worker threads.
+
+    Independent jobs run concurrently. Jobs on the same package are serialized
+    in submission order, so e.g. an uninstall never overlaps an install of the same app.
+    """
+    def __init__(self, event_bus, max_workers=MAX_PARALLEL_JOBS, tracer=None):
+        self.event_bus = event_bus
+        self.tracer = Tracer() if tracer is None else tracer # Disabled unless given
+        self._queue_seconds = None
+        if self.tracer.metrics is not None:
+            self._queue_seconds = self.tracer.metrics.histogram("job_queue_seconds", "Time jobs spent queued before a worker picked them up.")
+        self.max_workers = max(1, max_workers)
+        self._condition = threading.Condition()
+        self._pending = collections.deque() # Jobs waiting for a worker, in submission order
+        self._busy_packages = set() # Packages with a job currently running
+        self._jobs = {}
+        self._job_ids = itertools.count(1)
+        self._shutdown = False
+        self._workers = []
+        for i in range(self.max_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"JobWorker-{i + 1}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, kind, package_name, target, *args, channel=None):
+        """Queues `target(job_id, *args)` as a job on `package_name` and returns the Job.
+
+        `package_name` may also be a list of package names; the job then conflicts with
+        any other job on one of those packages. If `channel` is given it is subscribed to
+        the job's events before the job can start, so none of them can be missed.
+        """
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("JobScheduler has been shut down.")
+            job = Job(next(self._job_ids), kind, package_name, target, args)
+            if channel is not None:
+                self.event_bus.subscribe(channel, job.job_id)
+            self._jobs[job.job_id] = job
+            self._pending.append(job)
+            self._condition.notify()
+        return job
+
+    def get_job(self, job_id):
+        """Returns the Job with the given ID, or None."""
+        with self._condition:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        """Returns all jobs submitted so far, oldest first."""
+        with self._condition:
+            return list(self._jobs.values())
+
+    def shutdown(self):
+        """Stops the workers once their current job is done.
+
+        Queued jobs are dropped: they finish as cancelled, with return code -1.
+        """
+        with self._condition:
+            self._shutdown = True
+            dropped = list(self._pending)
+            self._pending.clear()
+            for job in dropped:
+                job.returncode = -1
+                job.status = JOB_CANCELLED
+            self._condition.notify_all()
+        for job in dropped:
+            self.event_bus.publish(JobError(job.job_id, "Cancelled: the store is shutting down."))
+            self.event_bus.publish(JobFinished(job.job_id, job.kind, job.package_name, job.returncode))
+            job._done.set()
+
+    def _take_runnable_job(self):
+        """Removes and returns the oldest pending job whose package is not busy. Caller holds the lock.
+
+        A job also waits for every older pending job that shares one of its packages, so jobs on
+        the same package run in submission order even when batches span several packages.
+        """
+        blocked_packages = set(self._busy_packages)
+        for job in self._pending:
+            if blocked_packages.isdisjoint(job.packages):
+                self._pending.remove(job)
+                return job
+            blocked_packages.update(job.packages) # Skipped: later jobs on its packages must wait for it
+        return None
+
+    def _worker_loop(self):
+        while True:
+            with self._condition:
+                job = None
+                while not self._shutdown:
+                    job = self._take_runnable_job()
+                    if job is not None:
+                        break
+                    self._condition.wait()
+                if job is None:
+                    return # Shut down
+                self._busy_packages.update(job.packages)
+                job.status = JOB_RUNNING
+
+            queue_seconds = time.monotonic() - job.submitted_at
+            if self._queue_seconds is not None:
+                self._queue_seconds.observe(queue_seconds, kind=job.kind)
+            self.event_bus.publish(JobStarted(job.job_id, job.kind, job.package_name))
+            with self.tracer.span(f"job.{job.kind}", job.job_id, package=job.package_name, queue_seconds=round(queue_seconds, 6)) as span:
+                try:
+                    rc = job.target(job.job_id, *job.args)
+                    rc = 0 if rc is None else rc
+                except Exception as e:
+                    self.event_bus.publish(JobError(job.job_id, f"Job crashed: {e}"))
+                    rc = 1
+                span.set(returncode=rc)
+
+            with self._condition:
+                job.returncode = rc
+                job.status = JOB_SUCCEEDED if rc == 0 else JOB_FAILED
+                self._busy_packages.difference_update(job.packages)
+                # A job on this package may have been waiting behind the one that just finished
+                self._condition.notify_all()
+            self.event_bus.publish(JobFinished(job.job_id, job.kind, job.package_name, rc))
+            job._done.set()
+
+
+class SupervisedApp:
+    """An app launched by the ProcessSupervisor, with its latest resource sample."""
+    def __init__(self, app_id, job_id, display_name, module_name, process):
+        self.app_id = app_id
+        self.job_id = job_id # ID of the run job that launched it
+        self.display_name = display_name
+        self.module_name = module_name
+        self.process = process
+        self.pid = process.pid
+        self.started = time.monotonic()
+        self.cpu_percent = None # None until sampled twice (or where /proc is not available)
+        self.rss_bytes = None
+        self._cpu_ticks = None # utime + stime at the previous sample
+        self._sampled_at = None
+
+    def snapshot(self, now=None):
+        """Returns the app's state as a plain dict, safe to hand to other threads."""
+        now = time.monotonic() if now is None else now
+        return {"app_id": self.app_id, "display_name": self.display_name, "module_name": self.module_name,
+                "pid": self.pid, "uptime_seconds": now - self.started,
+                "cpu_percent": self.cpu_percent, "rss_bytes": self.rss_bytes}
+
+    def __repr__(self):
+        return f"SupervisedApp(#{self.app_id} {self.display_name} pid={self.pid})"
+
+
+class ProcessSupervisor:
+    """Keeps a registry of launched apps: reaps them, samples their resource use and stops them.
+
+    A single thread sweeps all apps once per `sample_interval`: exited apps are reaped with a
+    non-blocking poll() (so they never linger as zombies) and reported with AppExited, the others
+    get their CPU and memory use read from /proc/<pid>/stat. After each sweep an AppsSampled event
+    carries the state of every running app. The thread only runs while apps are running.
+    On platforms without /proc, apps are still reaped and stopped but not sampled.
+    """
+    def __init__(self, event_bus, sample_interval=APP_SAMPLE_INTERVAL_SECONDS, niceness=APP_NICENESS,
+                 max_memory_bytes=APP_MAX_MEMORY_MB * 1024 * 1024, max_cpu_seconds=APP_MAX_CPU_SECONDS):
+        self.event_bus = event_bus
+        self.sample_interval = sample_interval
+        self.niceness = niceness
+        self.max_memory_bytes = max_memory_bytes
+        self.max_cpu_seconds = max_cpu_seconds
+        self._lock = threading.Lock()
+        self._apps = {} # app ID -> SupervisedApp, for apps that have not been reaped yet
+        self._app_ids = itertools.count(1)
+        self._sweep_now = threading.Event() # Set to sweep before the interval is up, e.g. after a stop
+        self._thread = None # The sampling thread, while apps are running
+        self._clock_ticks = self._sysconf("SC_CLK_TCK", 100)
+        self._page_size = self._sysconf("SC_PAGE_SIZE", 4096)
+
+    def launch(self, command, display_name, module_name=None, job_id=None, stderr=None):
+        """Starts `command` under supervision and returns its SupervisedApp.
+
+        `stderr` is passed on to Popen, e.g. subprocess.PIPE to read the app's stderr.
+        """
+        # On Unix the app gets its own session, so stopping it also stops the processes it started
+        process = subprocess.Popen(command, stderr=stderr, start_new_session=(os.name == "posix"))
+        app = SupervisedApp(next(self._app_ids), job_id, display_name, module_name, process)
+        self._apply_limits(app)
+        with self._lock:
+            self._apps[app.app_id] = app
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample_loop, name="ProcessSupervisor", daemon=True)
+                self._thread.start()
+        return app
+
+    def apps(self):
+        """Returns snapshots of the running apps, in launch order."""
+        now = time.monotonic()
+        with self._lock:
+            return [app.snapshot(now) for app in self._apps.values()]
+
+    def stop(self, app_id, kill=False):
+        """Asks an app to exit (SIGTERM), or kills it (SIGKILL) if `kill`. Returns False if it is not running."""
+        with self._lock:
+            app = self._apps.get(app_id)
+        if app is None:
+            return False
+        self._signal(app, kill)
+        self._sweep_now.set() # Report the exit as soon as possible
+        return True
+
+    def stop_all(self, timeout=APP_STOP_TIMEOUT_SECONDS):
+        """Stops every running app and waits until all of them are reaped.
+
+        Apps still running `timeout` seconds after being asked to exit are killed.
+        """
+        with self._lock:
+            apps = list(self._apps.values())
+        for app in apps:
+            self._signal(app, kill=False)
+        deadline = time.monotonic() + timeout
+        for app in apps:
+            try:
+                app.process.wait(max(0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                self._signal(app, kill=True)
+                app.process.wait()
+        self._sweep_now.set() # Publish their AppExited events
+
+    def _signal(self, app, kill):
+        if app.process.returncode is not None:
+            return # Already reaped, so its PID may belong to another process by now
+        try:
+            if os.name == "posix":
+                os.killpg(app.pid, signal.SIGKILL if kill else signal.SIGTERM)
+            elif kill:
+                app.process.kill()
+            else:
+                app.process.terminate()
+        except (ProcessLookupError, PermissionError):
+            pass # Exited in the meantime
+
+    def _apply_limits(self, app):
+        """Applies the configured niceness and rlimits to a freshly launched app.
+
+        They are set on the running process rather than in a preexec_fn, which is not safe to use
+        from a process with threads. Failures are reported but do not stop the app.
+        """
+        try:
+            if self.niceness and hasattr(os, "setpriority"):
+                os.setpriority(os.PRIO_PROCESS, app.pid, self.niceness)
+            limits = []
+            if self.max_memory_bytes:
+                limits.append(("RLIMIT_AS", self.max_memory_bytes))
+            if self.max_cpu_seconds:
+                limits.append(("RLIMIT_CPU", self.max_cpu_seconds))
+            if limits and not hasattr(resource, "prlimit"):
+                self.event_bus.publish(JobError(app.job_id, "Resource limits for apps are not supported on this platform."))
+                return
+            for name, value in limits:
+                resource.prlimit(app.pid, getattr(resource, name), (value, value))
+        except OSError as e:
+            self.event_bus.publish(JobError(app.job_id, f"Could not apply resource limits to {app.display_name} (PID {app.pid}): {e}"))
+
+    def _sample_loop(self):
+        while True:
+            self._sweep()
+            with self._lock:
+                if not self._apps:
+                    self._thread = None # The next launch starts a new thread
+                    return
+            self._sweep_now.wait(self.sample_interval)
+            self._sweep_now.clear()
+
+    def _sweep(self):
+        """Reaps exited apps and samples the others, then publishes the results."""
+        now = time.monotonic()
+        with self._lock:
+            apps = list(self._apps.values())
+        exited = []
+        for app in apps:
+            if app.process.poll() is not None: # Reaps the app if it exited
+                exited.append(app)
+            else:
+                self._sample(app, now)
+        with self._lock:
+            for app in exited:
+                self._apps.pop(app.app_id, None)
+            snapshots = [app.snapshot(now) for app in self._apps.values()]
+        for app in exited:
+            self.event_bus.publish(AppExited(app.job_id, app.app_id, app.display_name, app.pid, app.process.returncode))
+        self.event_bus.publish(AppsSampled(None, snapshots))
+
+    def _sample(self, app, now):
+        """Updates the app's CPU and memory use from /proc/<pid>/stat. Only the app's main process is counted."""
+        try:
+            with open(f"/proc/{app.pid}/stat", "rb") as f:
+                stat = f.read()
+        except OSError:
+            return # No /proc on this platform, or the app exited just now
+        # Fields after the command name, which is in parentheses and may contain spaces.
+        # fields[0] is field 3 of proc(5), so utime, stime and rss (fields 14, 15, 24) are at 11, 12 and 21.
+        fields = stat[stat.rfind(b")") + 2:].split()
+        cpu_ticks = int(fields[11]) + int(fields[12])
+        app.rss_bytes = int(fields[21]) * self._page_size
+        if app._cpu_ticks is not None and now > app._sampled_at:
+            app.cpu_percent = 100.0 * (cpu_ticks - app._cpu_ticks) / self._clock_ticks / (now - app._sampled_at)
+        app._cpu_ticks = cpu_ticks
+        app._sampled_at = now
+
+    @staticmethod
+    def _sysconf(name, default):
+        try:
+            return os.sysconf(name)
+        except (AttributeError, ValueError, OSError):
+            return default # Not available on this platform
+
+
+class StoreUpgrader:
+    """Keeps the app store itself up to date without slowing down every install.
+
+    The upgrade is skipped while the on-disk cache says the last one is younger than the TTL
+    and the installed version has not changed since. When an upgrade is due it runs once
+    in the background; concurrent callers share that single run instead of each starting one.
+    """
+    def __init__(self, job_scheduler, command_runner, event_bus, cache_file=STORE_UPGRADE_CACHE_FILE, ttl=STORE_UPGRADE_TTL_SECONDS):
+        self.job_scheduler = job_scheduler
+        self.command_runner = command_runner
+        self.event_bus = event_bus
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._upgrade_job = None # Job of the upgrade in flight, if any
+
+    def installed_version(self):
+        """Returns the installed version of the app store, or None if it is not installed."""
+        from importlib import metadata
+        try:
+            return metadata.version(APP_STORE_PACKAGE_NAME)
+        except metadata.PackageNotFoundError:
+            return None
+
+    def is_fresh(self):
+        """True if the last upgrade is within the TTL and the installed version is unchanged."""
+        try:
+            with open(self.cache_file, encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return False # No cache yet, or unreadable: treat as stale
+        if not isinstance(cache, dict) or not isinstance(cache.get("checked_at"), (int, float)):
+            return False
+        if time.time() - cache["checked_at"] >= self.ttl:
+            return False
+        return cache.get("version") == self.installed_version()
+
+    def ensure_upgraded(self, offline=False, job_id=None):
+        """Queues a background upgrade job if one is due. Never blocks on pip.
+
+        Returns the upgrade Job (possibly one started earlier by another caller), or None if
+        the cache is fresh (or we are offline) and nothing needs to run. Status messages are
+        published on behalf of `job_id`, the job that asked.
+        """
+        if offline:
+            self.event_bus.publish(Progress(job_id, f"Offline mode: not checking for {APP_STORE_PACKAGE_NAME} upgrades."))
+            return None
+        with self._lock:
+            if self._upgrade_job is not None and self._upgrade_job.status in (JOB_QUEUED, JOB_RUNNING):
+                return self._upgrade_job # Someone already started it: share that run
+            if self.is_fresh():
+                self.event_bus.publish(Progress(job_id, f"{APP_STORE_PACKAGE_NAME} was checked recently, skipping self-upgrade."))
+                return None
+            self._upgrade_job = self.job_scheduler.submit("upgrade", APP_STORE_PACKAGE_NAME, self._upgrade)
+            self.event_bus.publish(Progress(job_id, f"Upgrading {APP_STORE_PACKAGE_NAME} in the background (job #{self._upgrade_job.job_id})."))
+            return self._upgrade_job
+
+    def _upgrade(self, job_id):
+        self.event_bus.publish(Progress(job_id, f"Ensuring {APP_STORE_PACKAGE_NAME} is installed/upgraded from PyPi..."))
+        # Use --break-system-packages if needed on Python 3.11+ in virtual environments
+        # where the venv might "inherit" global site-packages
+        # Add --user if installing outside a venv and without root, though venv is recommended
+        store_install_command = [sys.executable, '-m', 'pip', 'install', '--upgrade', APP_STORE_PACKAGE_NAME]
+        if sys.version_info >= (3, 11):
+             # Add --break-system-packages for newer Python versions in certain environments
+             # This might be needed if installing into a venv that copies system packages
+             # Use with caution. Alternatively, ensure you are in a clean venv.
+             # store_install_command.append('--break-system-packages')
+             pass # Not adding by default, user should manage environment
+
+        # The upgrade may also upgrade dependencies shared with the apps being installed alongside it
+        with environment_lock():
+            rc = self.command_runner.run_command(store_install_command, job_id)
+        if rc == 0:
+            self.event_bus.publish(Progress(job_id, f"{APP_STORE_PACKAGE_NAME} installed/upgraded successfully."))
+            self._write_cache(job_id)
+        else:
+            self.event_bus.publish(JobError(job_id, f"Failed to install/upgrade {APP_STORE_PACKAGE_NAME} (Return Code: {rc}). Will retry on the next install."))
+        return rc
+
+    def _write_cache(self, job_id):
+        cache = {"checked_at": time.time(), "version": self.installed_version()}
+        try:
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            # Write to a temporary file first so a crash never leaves a half-written cache
+            tmp_file = f"{self.cache_file}.tmp"
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(cache, f)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            self.event_bus.publish(JobError(job_id, f"Could not write {self.cache_file}: {e}"))
+
+
+class InstalledPackageIndex:
+    """In-process index of installed distributions, read with importlib.metadata.
+
+    The index is built once and then refreshed incrementally: only the import path
+    directories whose modification time changed (pip adds/removes *.dist-info folders
+    in them) are rescanned. No subprocess is ever run to check installed state.
+
+    `path_owners` optionally maps a directory to the only package counted from it, e.g. an
+    app's own environment, where its dependencies must not count as installed apps.
+    With `scan=False`, nothing counts as installed until the first refresh().
+    """
+    def __init__(self, search_paths=None, path_owners=None, scan=True):
+        self.search_paths = list(sys.path) if search_paths is None else list(search_paths)
+        self.path_owners = dict(path_owners or {})
+        self._lock = threading.Lock()
+        self._dir_mtimes = {} # directory -> st_mtime_ns when it was last scanned
+        self._dists_by_dir = {} # directory -> {normalized name: version}
+        self._versions = {} # normalized name -> version, first match on the search path wins
+        if scan:
+            self.refresh()
+
+    def set_search_paths(self, search_paths, path_owners=None):
+        """Replaces the directories to look in. Only new ones are scanned on the next refresh()."""
+        with self._lock:
+            self.search_paths = list(search_paths)
+            self.path_owners = dict(path_owners or {})
+        return self.refresh()
+
+    def refresh(self):
+        """Rescans changed directories. Returns True if the set of installed packages changed."""
+        with self._lock:
+            dir_mtimes = {}
+            for path in self.search_paths:
+                try:
+                    dir_mtimes[path] = os.stat(path or ".").st_mtime_ns
+                except OSError:
+                    continue # Missing path entries (e.g. zip files that don't exist) are skipped
+            if dir_mtimes == self._dir_mtimes:
+                return False
+
+            for path, mtime in dir_mtimes.items():
+                if self._dir_mtimes.get(path) != mtime:
+                    self._dists_by_dir[path] = self._scan_directory(path)
+            for path in set(self._dists_by_dir) - set(dir_mtimes):
+                del self._dists_by_dir[path]
+            self._dir_mtimes = dir_mtimes
+
+            versions = {}
+            for path in self.search_paths:
+                owner = self.path_owners.get(path)
+                for name, version in self._dists_by_dir.get(path, {}).items():
+                    if owner is None or name == owner:
+                        versions.setdefault(name, version)
+            changed = versions != self._versions
+            self._versions = versions
+            return changed
+
+    @staticmethod
+    def _scan_directory(path):
+        from importlib import metadata
+        dists = {}
+        for dist in metadata.distributions(path=[path]):
+            name = dist.metadata["Name"]
+            if name:
+                dists.setdefault(normalize_package_name(name), dist.version)
+        return dists
+
+    def version(self, package_name):
+        """Returns the installed version of `package_name`, or None if it is not installed."""
+        with self._lock:
+            return self._versions.get(normalize_package_name(package_name))
+
+    def is_installed(self, package_name):
+        return self.version(package_name) is not None
+
+
+class WheelCache:
+    """Store-managed cache of wheels, keyed by package and version and verified by their SHA-256.
+
+    Apps are installed from the cache with `pip install --no-index --find-links`. Wheels that
+    are missing are downloaded or built once with `pip wheel` (unless offline) and added to it.
+    An index file records each wheel's hash, size and last use for size-based LRU eviction.
+    Wheels the store built have their hash recorded right away; wheels dropped into the cache
+    (a pre-seeded cache) when verify() first sees them. Before every install, verify() checks
+    the wheels that changed since against the recorded hash.
+    """
+    INDEX_FILE_NAME = "index.json"
+
+    def __init__(self, cache_dir=WHEEL_CACHE_DIR, max_bytes=WHEEL_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = None # file name -> {"package", "version", "sha256", "size", "mtime_ns", "last_used"}
+
+    def install(self, command_runner, package_names, job_id, offline=False, on_output=None, target_python=None):
+        """Installs `package_names`, preferring cached wheels. Returns the pip return code.
+
+        Packages go into the environment of `target_python` if given, else into the store's own.
+        """
+        if offline or self.contains(package_names):
+            rc = self._install_from_cache(command_runner, package_names, job_id, on_output, target_python)
+            if rc == 0 or offline:
+                return rc
+            # Some dependency was not cached yet: fetch the missing wheels below
+
+        # Download prebuilt wheels or build them from source, once, into a staging directory
+        import shutil
+        import tempfile
+        os.makedirs(self.cache_dir, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(prefix=".staging-", dir=self.cache_dir)
+        try:
+            wheel_command = [sys.executable, '-m', 'pip', 'wheel', '--wheel-dir', staging_dir,
+                             '--find-links', self.cache_dir] + list(package_names)
+            if command_runner.run_command(wheel_command, job_id) != 0:
+                # Could not produce wheels (e.g. an sdist that won't build): let pip try directly
+                with environment_lock(target_python):
+                    return command_runner.run_command(pip_install_command(target_python) + list(package_names), job_id, on_output=on_output)
+            self._add_wheels(staging_dir)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        return self._install_from_cache(command_runner, package_names, job_id, on_output, target_python)
+
+    def _install_from_cache(self, command_runner, package_names, job_id, on_output, target_python=None):
+        for file_name in self.verify():
+            command_runner.event_bus.publish(JobError(job_id, f"Removed {file_name} from the wheel cache: it does not match its recorded SHA-256."))
+        install_command = pip_install_command(target_python) + ['--no-index', '--find-links', self.cache_dir] + list(package_names)
+        stdout = StdoutCollector(on_output)
+        with environment_lock(target_python):
+            rc = command_runner.run_command(install_command, job_id, on_output=stdout)
+        if rc == 0:
+            used = parse_pip_installed_names(stdout.text())
+            used.update(normalize_package_name(name) for name in package_names)
+            self._touch(used)
+        return rc
+
+    def contains(self, package_names):
+        """True if a wheel of every one of `package_names` is in the cache."""
+        with self._lock:
+            cached = {entry["package"] for entry in self._load_entries().values()}
+        return all(normalize_package_name(name) in cached for name in package_names)
+
+    def verify(self):
+        """Checks the cached wheels against their recorded SHA-256. Returns the file names of the removed ones.
+
+        Entries whose wheel is missing are dropped. Only wheels whose size or mtime changed since
+        they were recorded are hashed again: if the content is the same (e.g. copied in again),
+        the new size and mtime are recorded, otherwise the wheel is removed and fetched again
+        next time. Wheels without a recorded hash yet get theirs recorded.
+        """
+        removed = []
+        with self._lock:
+            entries = self._load_entries()
+            for file_name, entry in list(entries.items()):
+                path = os.path.join(self.cache_dir, file_name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    del entries[file_name]
+                    continue
+                if entry["sha256"] is not None and st.st_size == entry["size"] and st.st_mtime_ns == entry["mtime_ns"]:
+                    continue
+                digest = hash_file(path)
+                if entry["sha256"] is None or digest == entry["sha256"]:
+                    entries[file_name] = self._make_entry(file_name, entry["last_used"], digest)
+                else:
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                    del entries[file_name]
+                    removed.append(file_name)
+            self._save_entries()
+        return removed
+
+    def _add_wheels(self, source_dir):
+        """Moves the wheels the store just built or downloaded into `source_dir` into the cache and records their hashes."""
+        with self._lock:
+            entries = self._load_entries()
+            now = time.time()
+            for file_name in os.listdir(source_dir):
+                if not file_name.endswith(".whl"):
+                    continue
+                path = os.path.join(self.cache_dir, file_name)
+                os.replace(os.path.join(source_dir, file_name), path)
+                entries[file_name] = self._make_entry(file_name, now, hash_file(path))
+            self._evict(entries)
+            self._save_entries()
+
+    def _touch(self, normalized_names):
+        with self._lock:
+            now = time.time()
+            for entry in self._load_entries().values():
+                if entry["package"] in normalized_names:
+                    entry["last_used"] = now
+            self._save_entries()
+
+    def _evict(self, entries):
+        """Removes least recently used wheels until the cache fits in max_bytes. Caller holds the lock."""
+        total = sum(entry["size"] for entry in entries.values())
+        for file_name, entry in sorted(entries.items(), key=lambda item: item[1]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, file_name))
+            except OSError:
+                pass # Already gone
+            total -= entry["size"]
+            del entries[file_name]
+
+    def _load_entries(self):
+        if self._entries is None:
+            try:
+                with open(os.path.join(self.cache_dir, self.INDEX_FILE_NAME), encoding="utf-8") as f:
+                    self._entries = json.load(f)
+            except (OSError, ValueError):
+                self._entries = {}
+            # Pre-seeded caches may come without an index: record any wheels that were dropped in.
+            # Hashing them is left to verify(), so that looking up a large cache stays cheap.
+            if os.path.isdir(self.cache_dir):
+                now = time.time()
+                for file_name in os.listdir(self.cache_dir):
+                    if file_name.endswith(".whl") and file_name not in self._entries:
+                        self._entries[file_name] = self._make_entry(file_name, now, None)
+        return self._entries
+
+    def _make_entry(self, file_name, last_used, sha256):
+        path = os.path.join(self.cache_dir, file_name)
+        st = os.stat(path)
+        # Wheel file names are {name}-{version}(-{build})?-{python}-{abi}-{platform}.whl
+        name, version = file_name.split("-")[:2]
+        return {
+            "package": normalize_package_name(name), "version": version,
+            "sha256": sha256, "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns, "last_used": last_used,
+        }
+
+    def _save_entries(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        index_file = os.path.join(self.cache_dir, self.INDEX_FILE_NAME)
+        with open(f"{index_file}.tmp", "w", encoding="utf-8") as f:
+            json.dump(self._entries, f)
+        os.replace(f"{index_file}.tmp", index_file)
+
+
+class StoreEngine:
+    """GUI-free install/uninstall/run/list logic, shared by the Tk app and the command line.
+
+    Every operation is queued as a job on the scheduler and returns its Job right away.
+    Progress is published on `event_bus` as the job runs.
+    With `load=False`, the catalog file and the installed packages are only read by load().
+    """
+    def __init__(self, max_workers=MAX_PARALLEL_JOBS, offline=OFFLINE_MODE, event_bus=None, isolated=ISOLATED_APPS,
+                 trace_file=TRACE_FILE, metrics_file=METRICS_FILE, metrics_port=METRICS_PORT, load=True):
+        self.event_bus = EventBus() if event_bus is None else event_bus
+        self.metrics = MetricsRegistry() if metrics_file or metrics_port else None
+        self.metrics_exporter = MetricsExporter(self.metrics, metrics_file, metrics_port) if self.metrics is not None else None
+        self.tracer = Tracer(trace_file, self.metrics)
+        self.command_runner = CommandRunner(self.event_bus, tracer=self.tracer)
+        self.job_scheduler = JobScheduler(self.event_bus, max_workers, tracer=self.tracer)
+        self.store_upgrader = StoreUpgrader(self.job_scheduler, self.command_runner, self.event_bus)
+        self.isolated = isolated # Install each app into its own environment
+        self.app_envs = AppEnvironments(APP_ENVS_DIR)
+        if isolated:
+            self.installed_index = InstalledPackageIndex(*self._app_env_search_paths(), scan=False)
+        else:
+            self.installed_index = InstalledPackageIndex(scan=False)
+        self.wheel_cache = WheelCache()
+        self.process_supervisor = ProcessSupervisor(self.event_bus)
+        self.launch_history = LaunchHistory(LAUNCH_HISTORY_FILE)
+        self.offline = offline # Read by worker threads; may be flipped at any time
+        self.catalog_error = None # Why the catalog file could not be used, if it could not
+        self.catalog = AppCatalog(AVAILABLE_APPS) # Only the built-in apps until load() reads the catalog file
+        self.loaded = threading.Event() # Set once load() has finished
+        if load:
+            self.load()
+
+    def load(self, background=False):
+        """Reads the catalog file and scans the installed packages.
+
+        With `background`, this runs on a daemon thread that also checks the wheel cache, and
+        an EngineLoaded event is published when it is done. Until then the catalog only has
+        the built-in apps and no package counts as installed.
+        """
+        if background:
+            threading.Thread(target=self._load, args=(True,), name="StoreEngineLoader", daemon=True).start()
+        else:
+            self._load(False)
+
+    def _load(self, background):
+        started = time.monotonic()
+        try:
+            with self.tracer.span("startup.load", background=background):
+                try:
+                    catalog = AppCatalog(AVAILABLE_APPS, CATALOG_FILE)
+                except CatalogError as e:
+                    self.catalog_error = str(e)
+                    catalog = AppCatalog.builtin_only(AVAILABLE_APPS, CATALOG_FILE) # Fall back to the built-in apps
+                catalog.warm_up()
+                self.catalog = catalog
+                self.installed_index.refresh()
+                if background:
+                    # Loads the cache index and hashes new or changed wheels now rather than on the first install
+                    try:
+                        for file_name in self.wheel_cache.verify():
+                            self.event_bus.publish(JobError(None, f"Removed {file_name} from the wheel cache: it does not match its recorded SHA-256."))
+                    except OSError as e:
+                        self.event_bus.publish(JobError(None, f"Could not check the wheel cache: {e}"))
+        finally:
+            self.loaded.set()
+            if background:
+                self.event_bus.publish(EngineLoaded(None, time.monotonic() - started, self.catalog_error))
+
+    def reload_catalog(self):
+        """Reparses the catalog file if it changed. Returns True if the catalog changed.
+
+        A broken catalog file leaves the previous catalog in place and sets `catalog_error`,
+        which stays set until the file changes again. The error is published as a JobError
+        once, when the broken file is parsed, not on every later call.
+        """
+        try:
+            changed = self.catalog.reload_if_changed()
+        except CatalogError as e:
+            self.catalog_error = str(e)
+            self.event_bus.publish(JobError(None, self.catalog_error))
+            return False
+        if changed:
+            self.catalog_error = None
+        return changed
+
+    def list_apps(self, query=""):
+        """Returns one dict per catalog app matching `query`, with its installed version (or None)."""
+        self.reload_catalog()
+        self.installed_index.refresh()
+        apps = []
+        for display_name in self.catalog.search(query):
+            app_info = self.catalog.get(display_name)
+            apps.append({
+                "display_name": display_name,
+                "package_name": app_info.get("package_name"),
+                "module_name": app_info.get("module_name"),
+                "installed_version": self.installed_index.version(app_info.get("package_name", "")),
+            })
+        return apps
+
+    def install(self, package_names, channel=None):
+        """Queues installation of one or more packages. Several are installed with one batched pip call."""
+        package_names = list(package_names)
+        if len(package_names) == 1:
+            return self.job_scheduler.submit("install", package_names[0], self._install_app, package_names[0], channel=channel)
+        return self.job_scheduler.submit("install", package_names, self._install_apps_batch, package_names, channel=channel)
+
+    def uninstall(self, package_name, channel=None):
+        return self.job_scheduler.submit("uninstall", package_name, self._uninstall_app, package_name, channel=channel)
+
+    def run(self, package_name, module_name, display_name, channel=None, profile=False):
+        """Queues a job that launches `python -m module_name`. It does not wait for the app to exit.
+
+        With `profile`, the launch is profiled and a LaunchProfiled event follows once the app shows its first window.
+        """
+        return self.job_scheduler.submit("run", package_name, self._run_app, package_name, module_name, display_name, profile, channel=channel)
+
+    def wait_all(self, timeout=None):
+        """Blocks until every job submitted so far (including background self-upgrades) has finished.
+
+        Returns False if `timeout` seconds passed first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            pending = [job for job in self.job_scheduler.jobs() if not job.wait(0)]
+            if not pending:
+                return True
+            # Finishing a job may have queued another one (e.g. a self-upgrade), so look again after each
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            if not pending[0].wait(remaining):
+                return False
+
+    def shutdown(self, stop_apps=False):
+        """Stops the engine. Launched apps keep running unless `stop_apps` is set."""
+        # Drop jobs that have not started yet; running ones finish on their daemon workers
+        self.job_scheduler.shutdown()
+        if stop_apps:
+            self.process_supervisor.stop_all()
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.close()
+        self.tracer.close()
+
+    def _install_app(self, job_id, target_package):
+        """Installs the target app, refreshing the app store itself if due. Returns the pip return code."""
+        # Step 1: Ensure the app store is up to date. This is skipped while the last upgrade
+        # is fresh, and otherwise runs once in the background shared by all install jobs.
+        with self.tracer.span("install.store_upgrade_check", job_id):
+            self.store_upgrader.ensure_upgraded(self.offline, job_id)
+
+        # Step 2: Install the selected application
+        self.event_bus.publish(Progress(job_id, f"Installing {target_package}..."))
+        if self.isolated:
+            return self._install_into_env(job_id, target_package)
+        stdout = StdoutCollector()
+
+        # Installs from the local wheel cache, fetching wheels into it first if needed
+        rc = self.wheel_cache.install(self.command_runner, [target_package], job_id, offline=self.offline, on_output=stdout)
+        if rc == 0:
+            self._precompile(job_id, parse_pip_installed_names(stdout.text()) | {normalize_package_name(target_package)})
+        return rc
+
+    def _install_into_env(self, job_id, package_name):
+        """Installs an app into its own environment, sharing files with the other environments."""
+        started = time.monotonic()
+        env_name = normalize_package_name(package_name)
+        with self.tracer.span("install.create_env", job_id, env=env_name):
+            env_python = self.app_envs.create(env_name)
+        self.installed_index.set_search_paths(*self._app_env_search_paths())
+        stdout = StdoutCollector()
+
+        rc = self.wheel_cache.install(self.command_runner, [package_name], job_id, offline=self.offline,
+                                      on_output=stdout, target_python=env_python)
+        if rc == 0:
+            with self.tracer.span("install.deduplicate", job_id, env=env_name) as span:
+                shared_files, saved_bytes = self.app_envs.deduplicate(env_name)
+                span.set(shared_files=shared_files, saved_bytes=saved_bytes)
+            # Compile after linking: a linked source takes the shared copy's mtime, which the bytecode records
+            self._precompile(job_id, parse_pip_installed_names(stdout.text()) | {env_name},
+                             env_python, [self.app_envs.site_packages(env_name)])
+            self.event_bus.publish(Progress(job_id, f"Environment of {package_name} ready in {time.monotonic() - started:.1f}s, "
+                                                    f"sharing {shared_files} files ({saved_bytes / (1024 * 1024):.1f} MB) with other apps."))
+        return rc
+
+    def _precompile(self, job_id, package_names, python=sys.executable, search_paths=None):
+        """Compiles the bytecode of freshly installed packages, using every CPU.
+
+        This way the first launch of an app does not pay for compiling it. Failures (e.g. a
+        bundled file with a syntax error) are reported but do not fail the install.
+        """
+        paths = installed_source_paths(package_names, search_paths)
+        if not paths:
+            return
+        started = time.monotonic()
+        # -j 0 runs one compileall worker per CPU
+        rc = self.command_runner.run_command([python, '-m', 'compileall', '-q', '-j', '0'] + paths, job_id)
+        if rc == 0:
+            self.event_bus.publish(Progress(job_id, f"Precompiled bytecode of {', '.join(sorted(package_names))} in {time.monotonic() - started:.1f}s."))
+        else:
+            self.event_bus.publish(JobError(job_id, "Some files could not be precompiled; they will be compiled on first import."))
+
+    def _app_env_search_paths(self):
+        """Returns (search_paths, path_owners) for an InstalledPackageIndex over the app environments."""
+        path_owners = {self.app_envs.site_packages(name): name for name in self.app_envs.names()}
+        return list(path_owners), path_owners
+
+    def _install_apps_batch(self, job_id, package_names):
+        """Installs several apps with a single pip invocation so dependencies are resolved once.
+
+        Reports success or failure per package. Returns 0 only if every package got installed.
+        """
+        self.store_upgrader.ensure_upgraded(self.offline, job_id)
+
+        if self.isolated:
+            # Every app gets its own environment, so there is no shared resolution to batch
+            results = {}
+            for package_name in package_names:
+                self.event_bus.publish(Progress(job_id, f"Installing {package_name}..."))
+                results[package_name] = self._install_into_env(job_id, package_name) == 0
+            for package_name, installed in results.items():
+                self.event_bus.publish(Progress(job_id, f"  {package_name}: {'installed' if installed else 'FAILED'}"))
+            return 0 if all(results.values()) else 1
+
+        self.event_bus.publish(Progress(job_id, f"Installing {', '.join(package_names)} in one batch..."))
+        stdout = StdoutCollector()
+
+        rc = self.wheel_cache.install(self.command_runner, package_names, job_id, offline=self.offline, on_output=stdout)
+        if rc == 0:
+            results = {package_name: True for package_name in package_names}
+        else:
+            # pip installs nothing when resolving the batch fails, so one bad package would
+            # block all the others. Fall back to installing the rest one at a time.
+            results = parse_pip_install_report(stdout.text(), package_names)
+            self.event_bus.publish(JobError(job_id, "Batched installation failed. Retrying packages one at a time..."))
+            for package_name in package_names:
+                if not results[package_name]:
+                    single_rc = self.wheel_cache.install(self.command_runner, [package_name], job_id, offline=self.offline, on_output=stdout)
+                    results[package_name] = single_rc == 0
+
+        installed_packages = {normalize_package_name(package_name) for package_name, ok in results.items() if ok}
+        if installed_packages:
+            self._precompile(job_id, parse_pip_installed_names(stdout.text()) | installed_packages)
+
+        for package_name, installed in results.items():
+            self.event_bus.publish(Progress(job_id, f"  {package_name}: {'installed' if installed else 'FAILED'}"))
+        return 0 if all(results.values()) else 1
+
+    def _uninstall_app(self, job_id, package_name):
+        """Uninstalls the specified application. Returns the pip return code."""
+        if self.isolated:
+            # Removing the app's environment cannot break any other app
+            env_name = normalize_package_name(package_name)
+            if not self.app_envs.exists(env_name):
+                self.event_bus.publish(JobError(job_id, f"{package_name} has no environment to remove."))
+                return 1
+            with self.tracer.span("uninstall.remove_env", job_id, env=env_name) as span:
+                freed_bytes = self.app_envs.remove(env_name)
+                span.set(freed_bytes=freed_bytes)
+            self.installed_index.set_search_paths(*self._app_env_search_paths())
+            self.event_bus.publish(Progress(job_id, f"Removed the environment of {package_name}, freeing {freed_bytes / (1024 * 1024):.1f} MB of shared files."))
+            return 0
+        # Use -y to avoid interactive confirmation
+        uninstall_command = [sys.executable, '-m', 'pip', 'uninstall', package_name, '-y']
+        with environment_lock():
+            return self.command_runner.run_command(uninstall_command, job_id)
+
+    def _run_app(self, job_id, package_name, module_name, display_name, profile=False):
+        """
+        Runs the specified application module using `python -m <module_name>`,
+        with the interpreter of the app's own environment in isolated mode.
+        With `profile`, it runs through the launch probe with `-X importtime` instead.
+        This launches the application in a separate process.
+        If the launched application is a GUI, it will appear in its own window(s),
+        separate from the App Store window.
+        Returns 0 once the process is launched; the job does NOT wait for the app to exit.
+        The process supervisor reaps it and publishes AppExited when it does.
+        """
+        # Use sys.executable to ensure we use the correct python interpreter
+        python = sys.executable
+        if self.isolated:
+            env_name = normalize_package_name(package_name)
+            if not self.app_envs.exists(env_name):
+                self.event_bus.publish(JobError(job_id, f"{display_name} is not installed in its own environment. Install it first."))
+                return 1
+            python = self.app_envs.python(env_name)
+        run_command = probe_command(python, module_name) if profile else [python, '-m', module_name]
+
+        try:
+            self.event_bus.publish(Progress(job_id, f"Launching process: {' '.join(run_command)}"))
+            # DO NOT wait for the process to finish: the launched app (especially a GUI) runs
+            # independently, while the supervisor reaps it, samples it and can stop it.
+            # We don't capture stdout/stderr for GUI apps launched this way,
+            # as they often detach or manage their own output/errors.
+            launch_profile = LaunchProfile(package_name, self.installed_index.version(package_name), module_name)
+            with self.tracer.span("run.launch", job_id, module=module_name, profile=profile) as span:
+                app = self.process_supervisor.launch(run_command, display_name, module_name, job_id,
+                                                     stderr=subprocess.PIPE if profile else None)
+                span.set(pid=app.pid)
+            if profile:
+                threading.Thread(target=self._collect_launch_profile, args=(job_id, app, launch_profile),
+                                 name=f"LaunchProfile-{app.pid}", daemon=True).start()
+            self.event_bus.publish(Progress(job_id, f"{display_name} process launched with PID: {app.pid}"))
+            self.event_bus.publish(Progress(job_id, f"Interact with {display_name} in its own window(s)."))
+            return 0
+
+        except FileNotFoundError:
+            self.event_bus.publish(JobError(job_id, f"Python interpreter or module '{module_name}' not found."))
+            return 1
+        except Exception as e:
+            # Catch other potential errors during Popen, like permission issues
+            self.event_bus.publish(JobError(job_id, f"Failed to launch application '{display_name}': {e}"))
+            return 1
+
+
+    def _collect_launch_profile(self, job_id, app, launch_profile):
+        """Reads a profiled app's stderr until it exits, recording the launch once its first window is up.
+
+        Lines that are not part of the profile are the app's own stderr and are passed on as output.
+        """
+        recorded = False
+        for line in iter(app.process.stderr.readline, b""):
+            line = line.decode(errors="replace")
+            if not launch_profile.feed_line(line):
+                self.event_bus.publish(OutputChunk(job_id, "stderr", line))
+            elif not recorded and launch_profile.time_to_first_window is not None:
+                recorded = True
+                self._record_launch_profile(job_id, app.display_name, launch_profile)
+        app.process.stderr.close()
+        if not recorded:
+            self._record_launch_profile(job_id, app.display_name, launch_profile)
+
+    def _record_launch_profile(self, job_id, display_name, launch_profile):
+        profile = launch_profile.to_dict()
+        previous = self.launch_history.previous(profile["package_name"], profile["version"])
+        self.launch_history.append(profile)
+        self.event_bus.publish(LaunchProfiled(job_id, display_name, profile, previous))
+
+
+def format_output_chunk(stream_name, text):
+    """Formats a captured output chunk for display, marking stderr lines as errors."""
+    if stream_name == "stderr":
+        return "".join(f"[ERROR] {line}" for line in text.splitlines(keepends=True)) # Differentiate errors
+    return text
+
+
+def command_span_name(command):
+    """Names the trace span of a command, e.g. "pip.install", "pip.wheel" or "compileall"."""
+    if command[1:2] == ['-m'] and len(command) > 2:
+        if command[2] == 'pip':
+            arguments = iter(command[3:])
+            for argument in arguments:
+                if argument == '--python':
+                    next(arguments, None) # Skip the option's value
+                elif not argument.startswith('-'):
+                    return f"pip.{argument}"
+        return command[2]
+    return "command"
+
+
+def pip_install_command(target_python=None):
+    """Returns the start of a `pip install` command line.
+
+    With `target_python`, the store's pip installs into that interpreter's environment
+    (`pip --python`, pip 22.3+), so app environments do not need a pip of their own.
+    pip does not compile bytecode; StoreEngine._precompile does that in parallel afterwards.
+    """
+    command = [sys.executable, '-m', 'pip']
+    if target_python:
+        command += ['--python', target_python]
+    return command + ['install', '--no-compile']
+
+
+_environment_locks = {} # Interpreter path -> lock serializing the pip runs that change its environment
+_environment_locks_guard = threading.Lock()
+
+
+def environment_lock(python=None):
+    """Returns the lock to hold while pip installs into or uninstalls from the environment of `python`.
+
+    pip is not safe to run concurrently on one environment, and two apps may share a dependency,
+    so changes to an environment run one at a time. Downloads and wheel builds need no lock.
+    """
+    key = os.path.abspath(python or sys.executable)
+    with _environment_locks_guard:
+        return _environment_locks.setdefault(key, threading.Lock())
+
+
+def installed_source_paths(package_names, search_paths=None):
+    """Returns the top-level packages and modules that the given installed distributions put on the path."""
+    from importlib import metadata
+    paths = set()
+    for package_name in package_names:
+        for dist in metadata.distributions(name=package_name, path=sys.path if search_paths is None else search_paths):
+            for file in dist.files or ():
+                top = file.parts[0]
+                if top == ".." or top == "__pycache__" or top.endswith((".dist-info", ".egg-info", ".data")):
+                    continue # Scripts, metadata and bytecode
+                if len(file.parts) == 1 and not top.endswith(".py"):
+                    continue # Top-level .pth files, extension modules etc. have nothing to compile
+                paths.add(str(dist.locate_file(top)))
+            break # The first match on the path is the one that gets imported
+    return sorted(paths)
+
+
+def normalize_package_name(name):
+    """Normalizes a distribution name the way pip does (PEP 503), e.g. 'Gemini_Pong' -> 'gemini-pong'."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def parse_pip_install_report(output, package_names):
+    """Works out from pip's output which of `package_names` ended up installed.
+
+    Returns a dict mapping each requested package name to True (newly installed or
+    already satisfied) or False.
+    """
+    succeeded = parse_pip_installed_names(output)
+    return {name: normalize_package_name(name) in succeeded for name in package_names}
+
+
+def parse_pip_installed_names(output):
+    """Returns the normalized names pip reports as newly installed or already satisfied."""
+    succeeded = set()
+    for line in output.splitlines():
+        line = line.strip()
+        if line.startswith("Successfully installed "):
+            # e.g. "Successfully installed gemini-pong-1.0 gemini_breakout-1.2"
+            for item in line[len("Successfully installed "):].split():
+                succeeded.add(normalize_package_name(item.rsplit("-", 1)[0]))
+        elif line.startswith("Requirement already satisfied: "):
+            # e.g. "Requirement already satisfied: gemini_pong in ./venv/lib/..."
+            requirement = line[len("Requirement already satisfied: "):].split()[0]
+            succeeded.add(normalize_package_name(re.split(r"[<>=!~\[;]", requirement)[0]))
+    return succeeded
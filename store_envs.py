@@ -0,0 +1,129 @@
+"""
+This file contains the per-app environments of the application "Gemini AI App Store":
+one lightweight virtual environment per app, with identical installed files shared
+between environments through a content-addressed store of hard links.
+Author: SoftwareApkDev
+"""
+
+import os
+import stat
+import sys
+import threading
+
+from store_files import hash_file
+
+
+class AppEnvironments:
+    """The isolated environments of the installed apps, one directory per app under `envs_dir`.
+
+    Environments are created without pip (pip runs from the store's interpreter with
+    `pip --python <env python>`), which takes milliseconds. After an install, deduplicate()
+    replaces every file of the environment's site-packages by a hard link into the object
+    store (`envs_dir/.objects`), keyed by the SHA-256 of its content. A dependency shared by
+    several apps is therefore stored on disk only once. Objects are made read-only, so an
+    app cannot change a file in place under another app. Objects no longer linked from any
+    environment are removed by collect_garbage().
+
+    Environment names are normalized package names. Hard links need the environments and the
+    object store on the same file system; where linking fails, files are simply not shared.
+    """
+    OBJECTS_DIR_NAME = ".objects"
+
+    def __init__(self, envs_dir):
+        self.envs_dir = envs_dir
+        self.objects_dir = os.path.join(envs_dir, self.OBJECTS_DIR_NAME)
+        self._lock = threading.Lock() # Serializes linking against garbage collection
+
+    def env_dir(self, name):
+        return os.path.join(self.envs_dir, name)
+
+    def python(self, name):
+        """Returns the path of the environment's interpreter."""
+        if os.name == "nt":
+            return os.path.join(self.env_dir(name), "Scripts", "python.exe")
+        return os.path.join(self.env_dir(name), "bin", "python")
+
+    def site_packages(self, name):
+        if os.name == "nt":
+            return os.path.join(self.env_dir(name), "Lib", "site-packages")
+        return os.path.join(self.env_dir(name), "lib", f"python{sys.version_info[0]}.{sys.version_info[1]}", "site-packages")
+
+    def exists(self, name):
+        return os.path.exists(self.python(name))
+
+    def names(self):
+        """Returns the names of the existing environments."""
+        try:
+            entries = sorted(os.listdir(self.envs_dir))
+        except OSError:
+            return []
+        return [entry for entry in entries if not entry.startswith(".") and self.exists(entry)]
+
+    def create(self, name):
+        """Creates the environment unless it exists. Returns the path of its interpreter."""
+        if not self.exists(name):
+            import venv
+            os.makedirs(self.envs_dir, exist_ok=True)
+            # symlinks=True links to the store's interpreter instead of copying it (Windows needs copies)
+            venv.EnvBuilder(with_pip=False, symlinks=(os.name != "nt"), clear=True).create(self.env_dir(name))
+        return self.python(name)
+
+    def remove(self, name):
+        """Deletes the environment. Returns the number of bytes freed on disk."""
+        import shutil
+        shutil.rmtree(self.env_dir(name), ignore_errors=True)
+        return self.collect_garbage()
+
+    def deduplicate(self, name):
+        """Hard-links the environment's site-packages files into the object store.
+
+        Returns (number of files now shared with other environments, bytes saved by sharing them).
+        """
+        shared_files = 0
+        saved_bytes = 0
+        with self._lock:
+            for dir_path, dir_names, file_names in os.walk(self.site_packages(name)):
+                # Bytecode records the path of its source, so it is never identical across environments
+                dir_names[:] = [dir_name for dir_name in dir_names if dir_name != "__pycache__"]
+                for file_name in file_names:
+                    path = os.path.join(dir_path, file_name)
+                    st = os.lstat(path)
+                    if not stat.S_ISREG(st.st_mode) or st.st_nlink > 1:
+                        continue # Symlinks, and files that are already linked into the store
+                    object_path = self._object_path(hash_file(path), st.st_mode)
+                    try:
+                        if os.path.exists(object_path):
+                            # Another environment has the same file: point this one at the shared copy
+                            os.link(object_path, f"{path}.dedup")
+                            os.replace(f"{path}.dedup", path)
+                            shared_files += 1
+                            saved_bytes += st.st_size
+                        else:
+                            os.makedirs(os.path.dirname(object_path), exist_ok=True)
+                            os.link(path, object_path)
+                            if os.name == "posix":
+                                os.chmod(path, stat.S_IMODE(st.st_mode) & ~0o222)
+                    except OSError:
+                        return shared_files, saved_bytes # No hard links here (e.g. a different file system)
+        return shared_files, saved_bytes
+
+    def collect_garbage(self):
+        """Removes objects no environment links to any more. Returns the number of bytes freed."""
+        freed_bytes = 0
+        with self._lock:
+            for dir_path, _, file_names in os.walk(self.objects_dir):
+                for file_name in file_names:
+                    path = os.path.join(dir_path, file_name)
+                    try:
+                        st = os.lstat(path)
+                        if st.st_nlink == 1:
+                            os.remove(path)
+                            freed_bytes += st.st_size
+                    except OSError:
+                        pass # Already gone
+        return freed_bytes
+
+    def _object_path(self, digest, mode):
+        # Executable and non-executable files with the same content are different objects
+        suffix = "-x" if mode & 0o111 else ""
+        return os.path.join(self.objects_dir, digest[:2], f"{digest[2:]}{suffix}")
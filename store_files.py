@@ -0,0 +1,17 @@
+"""
+This file contains the file helpers shared by the modules of the application "Gemini AI App Store".
+Author: SoftwareApkDev
+"""
+
+# Size of a single read from a file or subprocess pipe. Large reads keep hashing and verbose pip output cheap.
+READ_CHUNK_SIZE = 64 * 1024
+
+
+def hash_file(path):
+    """Returns the SHA-256 hex digest of the file at `path`."""
+    import hashlib
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(READ_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,156 @@
+"""
+This file contains the launch profiler of the application "Gemini AI App Store":
+parsing the output of an app launched with `python -X importtime` through store_launch_probe.py,
+and the history file of launch profiles used to spot launch-time regressions between app versions.
+Author: SoftwareApkDev
+"""
+
+import json
+import os
+import threading
+import time
+
+PROBE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "store_launch_probe.py")
+# Written to stderr by the probe; must match the markers in store_launch_probe.py
+APP_START_MARKER = "gemini-app-store-launch: app-start"
+FIRST_WINDOW_MARKER = "gemini-app-store-launch: first-window"
+IMPORT_TIME_PREFIX = "import time:"
+# Number of slowest top-level imports kept per profile.
+TOP_IMPORTS = 10
+
+
+def probe_command(python, module_name):
+    """Returns the command line that launches `module_name` with the launch probe."""
+    return [python, '-X', 'importtime', PROBE_FILE, module_name]
+
+
+def parse_importtime_line(line):
+    """Parses a `-X importtime` line into (module, self_us, cumulative_us, depth).
+
+    Returns None for the header line and anything else. Nested imports are indented by two
+    spaces per level, so `depth` is 0 for the modules the app itself imported.
+    """
+    if not line.startswith(IMPORT_TIME_PREFIX):
+        return None
+    parts = line[len(IMPORT_TIME_PREFIX):].split("|")
+    if len(parts) != 3:
+        return None
+    try:
+        self_us, cumulative_us = int(parts[0]), int(parts[1])
+    except ValueError:
+        return None # The header line: "import time: self [us] | cumulative | imported package"
+    name = parts[2].rstrip("\n")
+    stripped = name.lstrip(" ")
+    return stripped, self_us, cumulative_us, (len(name) - len(stripped) - 1) // 2
+
+
+class LaunchProfile:
+    """Collects the profile of one app launch from the stderr lines of the probe."""
+    def __init__(self, package_name, version, module_name, started_at=None):
+        self.package_name = package_name
+        self.version = version
+        self.module_name = module_name
+        self.started_at = time.time() if started_at is None else started_at # Wall clock, shared with the app's process
+        self.time_to_first_window = None # Seconds, None if the app exited without showing a window
+        self.import_seconds = 0.0 # Time the app spent importing before its first window
+        self._top_level_imports = [] # (cumulative_us, module) of the app's depth 0 imports before its first window
+        self._app_started = False # Imports before this are the interpreter's and the probe's
+
+    def feed_line(self, line):
+        """Takes one stderr line. Returns False if it was not part of the profile (i.e. the app's own output)."""
+        if line.startswith(APP_START_MARKER):
+            self._app_started = True
+            return True
+        if line.startswith(FIRST_WINDOW_MARKER):
+            if self.time_to_first_window is None:
+                try:
+                    self.time_to_first_window = max(0.0, float(line[len(FIRST_WINDOW_MARKER):]) - self.started_at)
+                except ValueError:
+                    pass
+            return True
+        if not line.startswith(IMPORT_TIME_PREFIX):
+            return False
+        parsed = parse_importtime_line(line)
+        # Imports after the first window are not part of the launch
+        if parsed is not None and self._app_started and self.time_to_first_window is None:
+            module, self_us, cumulative_us, depth = parsed
+            self.import_seconds += self_us / 1e6
+            if depth == 0:
+                self._top_level_imports.append((cumulative_us, module))
+        return True
+
+    def to_dict(self):
+        slowest = sorted(self._top_level_imports, reverse=True)[:TOP_IMPORTS]
+        return {
+            "time": self.started_at, "package_name": self.package_name, "version": self.version,
+            "module_name": self.module_name, "time_to_first_window": self.time_to_first_window,
+            "import_seconds": round(self.import_seconds, 6),
+            "slowest_imports": [[module, cumulative_us / 1e6] for cumulative_us, module in slowest],
+        }
+
+
+class LaunchHistory:
+    """Launch profiles of every app, one JSON object per line, oldest first.
+
+    Once the file holds twice `max_entries` profiles it is rewritten with the newest `max_entries`.
+    """
+    def __init__(self, history_file, max_entries=1000):
+        self.history_file = history_file
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def append(self, profile):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.history_file), exist_ok=True)
+            with open(self.history_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(profile) + "\n")
+            entries = self._read()
+            if len(entries) >= 2 * self.max_entries:
+                with open(f"{self.history_file}.tmp", "w", encoding="utf-8") as f:
+                    f.writelines(json.dumps(entry) + "\n" for entry in entries[-self.max_entries:])
+                os.replace(f"{self.history_file}.tmp", self.history_file)
+
+    def entries(self, package_name=None):
+        """Returns the recorded profiles, of one app if `package_name` is given."""
+        with self._lock:
+            entries = self._read()
+        if package_name is not None:
+            entries = [entry for entry in entries if entry.get("package_name") == package_name]
+        return entries
+
+    def previous(self, package_name, version):
+        """Returns the newest profile of `package_name` recorded with a different version, or None."""
+        for entry in reversed(self.entries(package_name)):
+            if entry.get("version") != version and entry.get("time_to_first_window") is not None:
+                return entry
+        return None
+
+    def _read(self):
+        try:
+            with open(self.history_file, encoding="utf-8") as f:
+                lines = f.readlines()
+        except OSError:
+            return []
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue # Skip a line cut short by a crash
+        return entries
+
+
+def format_launch_profile(profile, previous=None):
+    """Formats a profile dict as a short report, compared to `previous` (another version's profile) if given."""
+    name = f"{profile['package_name']} {profile['version'] or ''}".strip()
+    if profile["time_to_first_window"] is None:
+        lines = [f"{name}: no window was shown (imports took {profile['import_seconds']:.2f}s)."]
+    else:
+        lines = [f"{name}: first window after {profile['time_to_first_window']:.2f}s, "
+                 f"of which {profile['import_seconds']:.2f}s importing."]
+        if previous is not None:
+            change = profile["time_to_first_window"] - previous["time_to_first_window"]
+            lines.append(f"  Version {previous['version']} took {previous['time_to_first_window']:.2f}s ({change:+.2f}s).")
+    if profile["slowest_imports"]:
+        lines.append("  Slowest imports: " + ", ".join(f"{module} {seconds:.3f}s" for module, seconds in profile["slowest_imports"]))
+    return "\n".join(lines)
@@ -0,0 +1,90 @@
+"""
+This file is the launch probe of the application "Gemini AI App Store".
+The store runs it as `python -X importtime store_launch_probe.py <module> [args...]` to profile
+the launch of an app: it runs the app's module as __main__, like `python -m <module>` would,
+and writes a line to stderr when the app shows its first Tk or pygame window.
+It imports nothing beyond what `python -m` itself imports (runpy), so it does not skew the profile.
+Author: SoftwareApkDev
+"""
+
+import importlib.machinery
+import os
+import runpy
+import sys
+import time
+
+# Must match the markers in store_launch.py
+APP_START_MARKER = "gemini-app-store-launch: app-start"
+FIRST_WINDOW_MARKER = "gemini-app-store-launch: first-window"
+
+_first_window_reported = False
+
+
+def report_first_window():
+    global _first_window_reported
+    if not _first_window_reported:
+        _first_window_reported = True
+        sys.stderr.write(f"{FIRST_WINDOW_MARKER} {time.time():.6f}\n")
+        sys.stderr.flush()
+
+
+def patch_tkinter(tkinter):
+    original_init = tkinter.Tk.__init__
+
+    def __init__(self, *args, **kwargs):
+        original_init(self, *args, **kwargs)
+        # <Map> fires once the window is actually on screen
+        self.bind("<Map>", lambda event: report_first_window(), add="+")
+
+    tkinter.Tk.__init__ = __init__
+
+
+def patch_pygame_display(display):
+    original_set_mode = display.set_mode
+
+    def set_mode(*args, **kwargs):
+        surface = original_set_mode(*args, **kwargs)
+        report_first_window()
+        return surface
+
+    display.set_mode = set_mode
+
+
+class WindowHookFinder:
+    """Patches the window-creating modules right after the app imports them.
+
+    Importing them up front would show up in the app's import profile, so this waits for the app.
+    """
+    PATCHES = {"tkinter": patch_tkinter, "pygame.display": patch_pygame_display}
+
+    def find_spec(self, fullname, path=None, target=None):
+        patch = self.PATCHES.get(fullname)
+        if patch is None:
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(fullname, path)
+        if spec is None or spec.loader is None or not hasattr(spec.loader, "exec_module"):
+            return spec
+        original_exec_module = spec.loader.exec_module
+
+        def exec_module(module):
+            original_exec_module(module)
+            patch(module)
+
+        spec.loader.exec_module = exec_module
+        return spec
+
+
+def main():
+    module_name = sys.argv[1]
+    sys.argv = sys.argv[1:]
+    # Import from the working directory like `python -m` does, not from the store's directory
+    sys.path[0] = os.getcwd()
+    sys.meta_path.insert(0, WindowHookFinder())
+    # Imports from here on are the app's own, not the interpreter's or the probe's
+    sys.stderr.write(f"{APP_START_MARKER}\n")
+    sys.stderr.flush()
+    runpy.run_module(module_name, run_name="__main__", alter_sys=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+This file contains the instrumentation of the application "Gemini AI App Store":
+timed spans written to a JSON-lines trace file, and an in-process metrics registry
+(counters and latency histograms) exported in the Prometheus text format.
+Both are off unless configured, and then cost next to nothing.
+Author: SoftwareApkDev
+"""
+
+import bisect
+import itertools
+import json
+import os
+import threading
+import time
+
+# Upper bounds of the latency histogram buckets, in seconds.
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+METRIC_PREFIX = "gemini_app_store_"
+# Label values escape backslashes, double quotes and newlines
+_LABEL_VALUE_ESCAPES = str.maketrans({"\\": "\\\\", '"': '\\"', "\n": "\\n"})
+
+
+class Counter:
+    """A monotonically increasing count per label set."""
+    def __init__(self, name, help_text, lock):
+        self.name = name
+        self.help_text = help_text
+        self._lock = lock
+        self._values = {} # sorted label items -> value
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def _prometheus_lines(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Counts observations (e.g. latencies in seconds) in cumulative buckets, per label set."""
+    def __init__(self, name, help_text, lock, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._lock = lock
+        self._values = {} # sorted label items -> [count per bucket (last one is +Inf), sum]
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def count(self, **labels):
+        with self._lock:
+            counts = self._values.get(tuple(sorted(labels.items())))
+            return sum(counts[:-1]) if counts else 0
+
+    def _prometheus_lines(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, counts in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {counts[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named counters and histograms, exported together with to_prometheus()."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {} # name -> Counter or Histogram
+
+    def counter(self, name, help_text):
+        """Returns the counter `name` (prefixed with METRIC_PREFIX), creating it if needed."""
+        with self._lock:
+            metric = self._metrics.get(METRIC_PREFIX + name)
+            if metric is None:
+                metric = self._metrics[METRIC_PREFIX + name] = Counter(METRIC_PREFIX + name, help_text, self._lock)
+            return metric
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        """Returns the histogram `name` (prefixed with METRIC_PREFIX), creating it if needed."""
+        with self._lock:
+            metric = self._metrics.get(METRIC_PREFIX + name)
+            if metric is None:
+                metric = self._metrics[METRIC_PREFIX + name] = Histogram(METRIC_PREFIX + name, help_text, self._lock, buckets)
+            return metric
+
+    def to_prometheus(self):
+        """Returns every metric in the Prometheus text exposition format."""
+        with self._lock:
+            lines = []
+            for name in sorted(self._metrics):
+                lines.extend(self._metrics[name]._prometheus_lines())
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path):
+        """Writes the metrics to `path` atomically, e.g. for node_exporter's textfile collector."""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+        os.replace(f"{path}.tmp", path)
+
+
+def _format_labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{str(value).translate(_LABEL_VALUE_ESCAPES)}"' for name, value in key) + "}"
+
+
+class Span:
+    """A timed operation. Use it as a context manager; set() adds attributes while it runs."""
+    __slots__ = ("tracer", "name", "job_id", "attributes", "span_id", "parent_id", "start_time", "_started")
+
+    def __init__(self, tracer, name, job_id, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.job_id = job_id
+        self.attributes = attributes
+        self.span_id = None
+        self.parent_id = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        self.tracer._start(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer._finish(self, exc)
+        return False
+
+
+class _NullSpan:
+    """What Tracer.span() returns while tracing is off: does nothing, allocates nothing."""
+    __slots__ = ()
+
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Records spans to a JSON-lines trace file and/or span metrics in a MetricsRegistry.
+
+    Every finished span is one line of `trace_file`, with its name, job ID, parent span,
+    start time, duration, status and attributes. With `metrics`, spans also feed the
+    span_duration_seconds histogram and spans_total counter. With neither, span()
+    returns a shared no-op object, so instrumented code pays only for the call.
+    """
+    def __init__(self, trace_file=None, metrics=None):
+        self.trace_file = trace_file
+        self.metrics = metrics
+        self.enabled = bool(trace_file) or metrics is not None
+        self._lock = threading.Lock()
+        self._file = None
+        self._span_ids = itertools.count(1)
+        self._local = threading.local() # Stack of the open spans of each thread, for parent IDs
+        if metrics is not None:
+            self._durations = metrics.histogram("span_duration_seconds", "Duration of traced operations.")
+            self._spans_total = metrics.counter("spans_total", "Traced operations by outcome.")
+
+    def span(self, name, job_id=None, **attributes):
+        """Returns a Span for `name`, to be used in a with statement."""
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, job_id, attributes)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _start(self, span):
+        span.span_id = next(self._span_ids)
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        if stack:
+            span.parent_id = stack[-1].span_id
+            if span.job_id is None:
+                span.job_id = stack[-1].job_id
+        stack.append(span)
+        span.start_time = time.time()
+        span._started = time.perf_counter()
+
+    def _finish(self, span, exc):
+        duration = time.perf_counter() - span._started
+        stack = self._local.stack
+        if stack and stack[-1] is span:
+            stack.pop()
+        if exc is not None:
+            status = "error"
+            span.attributes["error"] = f"{type(exc).__name__}: {exc}"
+        elif span.attributes.get("returncode", 0) != 0:
+            status = "failed"
+        else:
+            status = "ok"
+        if self.metrics is not None:
+            self._durations.observe(duration, span=span.name)
+            self._spans_total.inc(span=span.name, status=status)
+        if self.trace_file:
+            record = {"name": span.name, "span_id": span.span_id, "parent_id": span.parent_id, "job_id": span.job_id,
+                      "start": round(span.start_time, 6), "duration": round(duration, 6), "status": status,
+                      "attributes": span.attributes}
+            line = json.dumps(record, default=str) + "\n"
+            with self._lock:
+                if self._file is None:
+                    directory = os.path.dirname(self.trace_file)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    self._file = open(self.trace_file, "a", encoding="utf-8", buffering=1) # Line buffered
+                self._file.write(line)
+
+
+class MetricsExporter:
+    """Exports a MetricsRegistry to a file every `interval` seconds and/or over HTTP on localhost.
+
+    The HTTP endpoint serves GET /metrics for Prometheus to scrape.
+    """
+    def __init__(self, registry, metrics_file=None, port=0, interval=15.0):
+        self.registry = registry
+        self.metrics_file = metrics_file
+        self.interval = interval
+        self._stop_event = threading.Event()
+        self._server = None
+        if metrics_file:
+            threading.Thread(target=self._write_loop, name="MetricsExporter", daemon=True).start()
+        if port:
+            self._start_server(port)
+
+    def close(self):
+        """Stops exporting, writing the metrics file one last time."""
+        self._stop_event.set()
+        if self.metrics_file:
+            self.registry.write_file(self.metrics_file)
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _write_loop(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.registry.write_file(self.metrics_file)
+            except OSError:
+                pass # Try again next interval
+
+    def _start_server(self, port):
+        # Only imported when the endpoint is enabled, to keep startup fast
+        import http.server
+
+        registry = self.registry
+
+        class MetricsHandler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass # Scrapes are not worth logging
+
+        self._server = http.server.ThreadingHTTPServer(("127.0.0.1", port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name="MetricsEndpoint", daemon=True).start()